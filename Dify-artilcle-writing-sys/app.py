@@ -1,14 +1,34 @@
 # app.py
 from flask import Flask, render_template, request, redirect, url_for, flash, Response, stream_with_context, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import os
 import enum
 import requests
-import json
-import zipfile
-import xml.etree.ElementTree as ET
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from docx_utils import file_to_dify_input, is_docx, extract_docx_text
+
+logger = logging.getLogger(__name__)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """基于orjson的JSON序列化，jsonify 等接口统一走该实现"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 # 配置CORS，允许来自localhost:9000的跨域请求
 CORS(app, origins=['http://localhost:9000', 'http://127.0.0.1:9000'])
 
@@ -16,156 +36,89 @@ CORS(app, origins=['http://localhost:9000', 'http://127.0.0.1:9000'])
 DIFY_API_BASE_URL = 'http://localhost/v1'
 DIFY_API_TOKEN = os.environ.get('DIFY_API_TOKEN', 'app-C8SM64mhiX4oOqAXlsDei8Qu')
 
-# 文件类型映射
-EXT_TYPE_MAP = {
-    'application/pdf': 'pdf',
-    'application/msword': 'doc',
-    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'docx',
-    'text/plain': 'txt',
-    'text/markdown': 'markdown',
-    'text/html': 'html',
-    'application/vnd.ms-excel': 'xls',
-    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'xlsx',
-    'application/vnd.ms-powerpoint': 'ppt',
-    'application/vnd.openxmlformats-officedocument.presentationml.presentation': 'pptx',
-    'application/xml': 'xml',
-    'application/epub+zip': 'epub',
-    'image/jpeg': 'jpg',
-    'image/png': 'png',
-    'image/gif': 'gif',
-    'image/webp': 'webp',
-    'image/svg+xml': 'svg',
-    'audio/mpeg': 'mp3',
-    'audio/mp4': 'm4a',
-    'audio/wav': 'wav',
-    'audio/webm': 'webm',
-    'audio/amr': 'amr',
-    'video/mp4': 'mp4',
-    'video/quicktime': 'mov',
-    'video/mpeg': 'mpeg',
-    'audio/mpga': 'mpga',
-}
-EXT_FILETYPE_MAP = {
-    'pdf': 'document', 'doc': 'document', 'docx': 'document', 'txt': 'document', 'md': 'document', 'markdown': 'document', 'html': 'document',
-    'xls': 'document', 'xlsx': 'document', 'ppt': 'document', 'pptx': 'document', 'xml': 'document', 'epub': 'document',
-    'csv': 'document', 'eml': 'document', 'msg': 'document',
-    'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'gif': 'image', 'webp': 'image', 'svg': 'image',
-    'mp3': 'audio', 'm4a': 'audio', 'wav': 'audio', 'webm': 'audio', 'amr': 'audio', 'mpga': 'audio',
-    'mp4': 'video', 'mov': 'video', 'mpeg': 'video',
-}
-def guess_type(file):
-    mime = getattr(file, 'mimetype', None)
-    ext = EXT_TYPE_MAP.get(mime)
-    if not ext:
-        ext = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
-    return EXT_FILETYPE_MAP.get(ext, 'custom')
+# 复用连接的HTTP会话，避免每次调用Dify都重新建立TCP连接
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
 
-def file_to_dify_input(file, file_id):
-    file_type = guess_type(file)
-    return {
-        'type': file_type,
-        'upload_file_id': file_id,
-        'transfer_method': 'local_file'
-    }
+# 模型输出中的思考过程标签
+_THINK_RE = re.compile(r'<think>.*?</think>', re.DOTALL)
 
-def extract_docx_text(file_path):
-    """
-    提取docx文档的文本内容
-    """
-    try:
-        with zipfile.ZipFile(file_path, 'r') as docx:
-            # 读取document.xml文件
-            xml_content = docx.read('word/document.xml')
-            root = ET.fromstring(xml_content)
-            
-            # 定义命名空间
-            namespaces = {
-                'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
-            }
-            
-            # 提取所有文本
-            text_elements = root.findall('.//w:t', namespaces)
-            text_content = []
-            
-            for element in text_elements:
-                if element.text:
-                    text_content.append(element.text)
-            
-            result = '\n'.join(text_content).strip()
-            print(f"提取的文档内容长度: {len(result)}")
-            print(f"提取的文档内容前100字符: {result[:100]}")
-            return result if result else None
-    except Exception as e:
-        print(f"提取docx文本时出错: {e}")
-        return None
-
-def filter_nones(obj):
-    if isinstance(obj, dict):
-        return {k: filter_nones(v) for k, v in obj.items() if v is not None}
-    elif isinstance(obj, list):
-        return [filter_nones(i) for i in obj if i is not None]
-    else:
-        return obj
 
 @app.route('/', methods=['GET'])
 def index():
     return render_template('index.html', result=None)
 
+def _process_upload_field(field, file, user_id):
+    """
+    处理单个上传字段：提取docx正文并把文件上传到Dify
+    在线程池中执行，不访问请求上下文；上传失败时直接抛出异常
+    返回 (Dify文件输入, 提取的正文)，非docx文件正文为None
+    """
+    logger.debug("找到文件字段 %s: %s", field, file.filename)
+    extracted_text = None
+    # 如果是docx文件，提取文本内容
+    if is_docx(file):
+        logger.debug("开始提取 %s 的文档内容...", field)
+        extracted_text = extract_docx_text(file.stream)
+        if extracted_text:
+            logger.debug("%s 文档内容提取成功，长度: %s", field, len(extracted_text))
+        else:
+            extracted_text = "无法提取文档内容"
+            logger.debug("%s 文档内容提取失败", field)
+    else:
+        logger.debug("%s 不是docx文件，跳过内容提取", field)
+
+    url = f"{DIFY_API_BASE_URL}/files/upload"
+    headers = {"Authorization": f"Bearer {DIFY_API_TOKEN}"}
+    # 直接转发上传流，不再落盘后重新读取
+    file.stream.seek(0)
+    files_data = {'file': (file.filename, file.stream, file.mimetype)}
+    data = {'user': user_id}
+    resp = SESSION.post(url, headers=headers, files=files_data, data=data)
+    resp.raise_for_status()
+    file_id = resp.json()['id']
+    return file_to_dify_input(file, file_id), extracted_text
+
 @app.route('/upload', methods=['POST'])
 def upload():
-    print("=== /upload 接口被调用 ===")
+    logger.debug("/upload 接口被调用")
     # 处理多文件上传和参数
     user_id = request.form.get('user_id', 'demo_user')
-    print(f"用户ID: {user_id}")
+    logger.debug("用户ID: %s", user_id)
     
     files = {}
     file_contents = {}  # 存储文件内容
     file_fields = ['origin_article', 'imitate_article', 'Superior_docs']
     
-    print(f"检查的文件字段: {file_fields}")
-    print(f"请求中的文件: {list(request.files.keys())}")
+    logger.debug("检查的文件字段: %s", file_fields)
+    logger.debug("请求中的文件: %s", list(request.files.keys()))
     
+    # 各文件字段互不依赖，并行完成正文提取与上传Dify
+    uploads = {field: request.files.get(field) for field in file_fields}
+    with ThreadPoolExecutor(max_workers=len(file_fields)) as executor:
+        futures = {
+            field: executor.submit(_process_upload_field, field, file, user_id)
+            for field, file in uploads.items() if file
+        }
     for field in file_fields:
-        file = request.files.get(field)
-        if file:
-            print(f"找到文件字段 {field}: {file.filename}")
-            temp_path = os.path.join('static', file.filename)
-            file.save(temp_path)
-            
-            # 如果是docx文件，提取文本内容
-            if file.filename.lower().endswith('.docx'):
-                print(f"开始提取 {field} 的文档内容...")
-                extracted_text = extract_docx_text(temp_path)
-                if extracted_text:
-                    file_contents[field] = extracted_text
-                    print(f"{field} 文档内容提取成功，长度: {len(extracted_text)}")
-                else:
-                    file_contents[field] = "无法提取文档内容"
-                    print(f"{field} 文档内容提取失败")
-            else:
-                print(f"{field} 不是docx文件，跳过内容提取")
-            
-            try:
-                url = f"{DIFY_API_BASE_URL}/files/upload"
-                headers = {"Authorization": f"Bearer {DIFY_API_TOKEN}"}
-                with open(temp_path, 'rb') as f:
-                    files_data = {'file': (file.filename, f, file.mimetype)}
-                    data = {'user': user_id}
-                    resp = requests.post(url, headers=headers, files=files_data, data=data)
-                    resp.raise_for_status()
-                    file_info = resp.json()
-                    file_id = file_info['id']
-                files[field] = file_to_dify_input(file, file_id)
-            except Exception as e:
-                flash(f'{field} 文件上传失败: {e}')
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-                return redirect(url_for('index'))
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-        else:
+        future = futures.get(field)
+        if future is None:
             files[field] = None
             file_contents[field] = None
+            continue
+        try:
+            files[field], extracted_text = future.result()
+        except Exception as e:
+            flash(f'{field} 文件上传失败: {e}')
+            return redirect(url_for('index'))
+        if extracted_text is not None:
+            file_contents[field] = extracted_text
     # 组装inputs
     inputs = {
         'query': request.form.get('query', ''),
@@ -180,12 +133,12 @@ def upload():
         'Superior_docs': files['Superior_docs']
     }
     # 过滤None
-    inputs = filter_nones(inputs)
+    inputs = {k: v for k, v in inputs.items() if v is not None}
     sys_query = request.form.get('sys_query', '')
     
-    print("=== 构建响应数据 ===")
-    print(f"inputs: {inputs}")
-    print(f"file_contents: {file_contents}")
+    logger.debug("构建响应数据")
+    logger.debug("inputs: %s", inputs)
+    logger.debug("file_contents: %s", file_contents)
     
     response_data = {
         'inputs': inputs,
@@ -194,9 +147,9 @@ def upload():
         'file_contents': file_contents  # 添加文件内容到响应中
     }
     
-    print(f"最终响应数据: {response_data}")
+    logger.debug("最终响应数据: %s", response_data)
     
-    return Response(json.dumps(response_data, ensure_ascii=False), mimetype='application/json')
+    return Response(orjson.dumps(response_data), mimetype='application/json')
 
 @app.route('/stream_chat', methods=['POST'])
 def stream_chat():
@@ -221,12 +174,11 @@ def stream_chat():
                 "response_mode": "streaming",
                 "conversation_id": conversation_id
             }
-            with requests.post(url, headers=headers, json=payload, stream=True, timeout=120) as resp:
-                for line in resp.iter_lines():
-                    if line:
-                        if line.startswith(b'data:'):
-                            content = line[5:].decode('utf-8').strip()
-                            yield f"data: {content}\n\n"
+            with SESSION.post(url, headers=headers, json=payload, stream=True, timeout=120) as resp:
+                resp.raise_for_status()
+                # Dify返回的已是SSE格式，原样转发字节，不再逐行解码重组
+                for chunk in resp.iter_content(chunk_size=None):
+                    yield chunk
         except Exception as e:
             yield f"data: [ERROR] {str(e)}\n\n"
     return Response(stream_with_context(event_stream()), mimetype='text/event-stream')
@@ -261,9 +213,8 @@ def generate_ppt():
         }
   
        
-        response = requests.post(url, headers=headers, json=payload, timeout=300)
-        print(f"Dify响应状态码: {response.status_code}")
-        print(f"Dify响应内容: {response.text[:500]}...")
+        response = SESSION.post(url, headers=headers, json=payload, timeout=300)
+        logger.debug("Dify响应状态码: %s，字节数: %s", response.status_code, len(response.content))
         
         response.raise_for_status()
         
@@ -271,8 +222,7 @@ def generate_ppt():
         
         # 从结果中提取answer内容并清理think标签
         raw_answer = result.get('answer', '')
-        import re
-        clean_answer = re.sub(r'<think>.*?</think>', '', raw_answer, flags=re.DOTALL)
+        clean_answer = _THINK_RE.sub('', raw_answer)
         
         return jsonify({'answer': clean_answer})
         
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+文档处理公共模块
+智能文件撰写系统（app.py）与统一门户中的 writing 蓝图共用：
+文件类型推测、Dify文件输入构造、docx/txt正文提取
+"""
+import logging
+import zipfile
+from types import MappingProxyType
+
+try:
+    from lxml import etree as ET
+    LXML_AVAILABLE = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    LXML_AVAILABLE = False
+    logging.warning("lxml not available. Falling back to xml.etree for docx parsing.")
+
+logger = logging.getLogger(__name__)
+
+# 文件类型映射（只读）
+EXT_TYPE_MAP = MappingProxyType({
+    'application/pdf': 'pdf',
+    'application/msword': 'doc',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'docx',
+    'text/plain': 'txt',
+    'text/markdown': 'markdown',
+    'text/html': 'html',
+    'application/vnd.ms-excel': 'xls',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'xlsx',
+    'application/vnd.ms-powerpoint': 'ppt',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation': 'pptx',
+    'application/xml': 'xml',
+    'application/epub+zip': 'epub',
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+    'image/svg+xml': 'svg',
+    'audio/mpeg': 'mp3',
+    'audio/mp4': 'm4a',
+    'audio/wav': 'wav',
+    'audio/webm': 'webm',
+    'audio/amr': 'amr',
+    'video/mp4': 'mp4',
+    'video/quicktime': 'mov',
+    'video/mpeg': 'mpeg',
+    'audio/mpga': 'mpga',
+})
+EXT_FILETYPE_MAP = MappingProxyType({
+    'pdf': 'document', 'doc': 'document', 'docx': 'document', 'txt': 'document', 'md': 'document', 'markdown': 'document', 'html': 'document',
+    'xls': 'document', 'xlsx': 'document', 'ppt': 'document', 'pptx': 'document', 'xml': 'document', 'epub': 'document',
+    'csv': 'document', 'eml': 'document', 'msg': 'document',
+    'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'gif': 'image', 'webp': 'image', 'svg': 'image',
+    'mp3': 'audio', 'm4a': 'audio', 'wav': 'audio', 'webm': 'audio', 'amr': 'audio', 'mpga': 'audio',
+    'mp4': 'video', 'mov': 'video', 'mpeg': 'video',
+})
+# MIME类型直接到文件类型的合并映射
+MIME_TO_FILETYPE = MappingProxyType({
+    mime: EXT_FILETYPE_MAP[ext] for mime, ext in EXT_TYPE_MAP.items()
+})
+
+def guess_type(file):
+    # 先MIME后扩展名，与 censor_system FileService.guess_file_type 的优先级一致
+    file_type = MIME_TO_FILETYPE.get(getattr(file, 'mimetype', None))
+    if file_type:
+        return file_type
+    ext = file.filename.rpartition('.')[2].lower() if '.' in file.filename else ''
+    return EXT_FILETYPE_MAP.get(ext, 'custom')
+
+# docx/docm 本质是ZIP包，按文件头魔数识别，不依赖文件名
+_ZIP_MAGIC = b'PK\x03\x04'
+_DOCX_MIMETYPES = frozenset({
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/vnd.ms-word.document.macroEnabled.12',
+})
+_DOCX_EXTS = frozenset({'docx', 'docm'})
+
+def is_docx(file):
+    """
+    判断上传文件是否为docx：先比对ZIP文件头，再用MIME或扩展名排除xlsx/pptx等同为ZIP的格式
+    读取后会将文件流复位
+    """
+    sig = file.stream.read(4)
+    file.stream.seek(0)
+    if not sig.startswith(_ZIP_MAGIC):
+        return False
+    if file.mimetype in _DOCX_MIMETYPES:
+        return True
+    return file.filename.rpartition('.')[2].lower() in _DOCX_EXTS
+
+def file_to_dify_input(file, file_id):
+    file_type = guess_type(file)
+    return {
+        'type': file_type,
+        'upload_file_id': file_id,
+        'transfer_method': 'local_file'
+    }
+
+def extract_txt_text(file_obj):
+    """
+    提取txt文件的文本内容
+    file_obj 为二进制文件对象（如上传文件流），优先按UTF-8解码，失败后回退GBK
+    """
+    try:
+        raw = file_obj.read()
+    except Exception as e:
+        logger.warning("提取txt文本时出错: %s", e)
+        return None
+    try:
+        content = raw.decode('utf-8').strip()
+        logger.debug("提取的TXT文件内容长度: %s", len(content))
+        logger.debug("提取的TXT文件内容前100字符: %s", content[:100])
+        return content if content else None
+    except UnicodeDecodeError:
+        # 如果UTF-8解码失败，尝试其他编码
+        try:
+            content = raw.decode('gbk').strip()
+            logger.debug("使用GBK编码提取的TXT文件内容长度: %s", len(content))
+            logger.debug("使用GBK编码提取的TXT文件内容前100字符: %s", content[:100])
+            return content if content else None
+        except Exception as e:
+            logger.warning("使用GBK编码提取txt文本时出错: %s", e)
+            return None
+
+# WordprocessingML 命名空间及常用标签
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W_P = f'{{{W_NS}}}p'
+W_T = f'{{{W_NS}}}t'
+
+def _iter_docx_paragraphs(xml_file):
+    """
+    流式产出document.xml中的 w:p 节点，调用方处理完后立即释放
+    优先使用lxml的fast_iter写法，缺少lxml时退回标准库iterparse
+    """
+    if LXML_AVAILABLE:
+        for _, elem in ET.iterparse(xml_file, events=('end',), tag=W_P, huge_tree=True):
+            yield elem
+            # fast_iter：清理当前节点及已处理的兄弟节点
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    else:
+        for _, elem in ET.iterparse(xml_file, events=('end',)):
+            if elem.tag == W_P:
+                yield elem
+                elem.clear()
+
+def extract_docx_text(file_obj):
+    """
+    提取docx文档的文本内容
+    file_obj 可以是文件路径或可随机读取的文件对象（如上传文件流）
+    按段落流式解析document.xml，处理完即释放节点，内存占用与单个段落同级
+    """
+    try:
+        with zipfile.ZipFile(file_obj, 'r') as docx:
+            text_content = []
+            with docx.open('word/document.xml') as xml_file:
+                for elem in _iter_docx_paragraphs(xml_file):
+                    text_content.extend(t.text for t in elem.iter(W_T) if t.text)
+            
+            result = '\n'.join(text_content).strip()
+            logger.debug("提取的文档内容长度: %s", len(result))
+            logger.debug("提取的文档内容前100字符: %s", result[:100])
+            return result if result else None
+    except Exception as e:
+        logger.warning("提取docx文本时出错: %s", e)
+        return None
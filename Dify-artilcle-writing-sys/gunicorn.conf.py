@@ -0,0 +1,22 @@
+# gunicorn.conf.py
+# 智能文件撰写系统生产环境部署配置
+# 启动命令：gunicorn -c gunicorn.conf.py app:app
+#
+# /stream_chat 为长连接SSE、/generate_ppt 为长时间阻塞调用，
+# 使用gevent协程worker，等待Dify响应期间不会占住整个worker。
+import multiprocessing
+import os
+
+bind = os.environ.get('WRITING_BIND', '0.0.0.0:5055')
+workers = int(os.environ.get('WRITING_WORKERS', min(4, multiprocessing.cpu_count())))
+worker_class = 'gevent'
+worker_connections = 1000
+
+# PPT生成接口的Dify超时为300秒，worker超时需大于该值
+timeout = 330
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('WRITING_LOG_LEVEL', 'info')
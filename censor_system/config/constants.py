@@ -3,18 +3,19 @@
 定义应用中使用的所有常量
 """
 import enum
+from types import MappingProxyType
 
-# 允许的文件扩展名
-ALLOWED_EXTENSIONS = {
+# 允许的文件扩展名（只读）
+ALLOWED_EXTENSIONS = frozenset({
     'pdf', 'doc', 'docx', 'txt', 'md', 'markdown', 'html',
     'xls', 'xlsx', 'ppt', 'pptx', 'xml', 'epub', 'csv',
     'jpg', 'jpeg', 'png', 'gif', 'webp', 'svg',
     'mp3', 'm4a', 'wav', 'webm', 'amr', 'mpga',
     'mp4', 'mov', 'mpeg'
-}
+})
 
-# 文件类型映射
-EXT_TYPE_MAP = {
+# 文件类型映射（只读）
+EXT_TYPE_MAP = MappingProxyType({
     'application/pdf': 'pdf',
     'application/msword': 'doc',
     'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'docx',
@@ -41,10 +42,10 @@ EXT_TYPE_MAP = {
     'video/quicktime': 'mov',
     'video/mpeg': 'mpeg',
     'audio/mpga': 'mpga',
-}
+})
 
-# 扩展名到文件类型映射
-EXT_FILETYPE_MAP = {
+# 扩展名到文件类型映射（只读）
+EXT_FILETYPE_MAP = MappingProxyType({
     'pdf': 'document', 'doc': 'document', 'docx': 'document', 
     'txt': 'document', 'md': 'document', 'markdown': 'document', 'html': 'document',
     'xls': 'document', 'xlsx': 'document', 'ppt': 'document', 'pptx': 'document', 
@@ -52,10 +53,15 @@ EXT_FILETYPE_MAP = {
     'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'gif': 'image', 'webp': 'image', 'svg': 'image',
     'mp3': 'audio', 'm4a': 'audio', 'wav': 'audio', 'webm': 'audio', 'amr': 'audio', 'mpga': 'audio',
     'mp4': 'video', 'mov': 'video', 'mpeg': 'video',
-}
+})
+
+# MIME类型直接到文件类型的合并映射，已知MIME时一次查表即可
+MIME_TO_FILETYPE = MappingProxyType({
+    mime: EXT_FILETYPE_MAP[ext] for mime, ext in EXT_TYPE_MAP.items()
+})
 
 # 支持的文件类型
-SUPPORTED_FILE_TYPES = {'document', 'image', 'audio', 'video'}
+SUPPORTED_FILE_TYPES = frozenset({'document', 'image', 'audio', 'video'})
 
 # 默认配置值
 DEFAULT_MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
@@ -68,6 +74,11 @@ DEFAULT_LOG_FILE = 'logs/app.log'
 # API相关常量
 API_TIMEOUT = 300  # 5分钟超时
 CHUNK_SIZE = 8192  # 文件读取块大小
+SSE_KEEPALIVE_INTERVAL = 15  # SSE心跳间隔（秒）
+HEALTH_CHECK_TIMEOUT = 1  # 健康检查请求超时（秒）
+HEALTH_CHECK_TTL = 5  # 健康检查结果缓存时间（秒）
+DOCX_POOL_WORKERS = 2  # Word文档生成进程数
+DOCX_BUILD_TIMEOUT = 30  # Word文档生成超时（秒）
 
 # 枚举类型定义
 class CategoryEnum(str, enum.Enum):
@@ -4,6 +4,8 @@
 """
 import os
 import secrets
+from functools import lru_cache
+import orjson
 from dotenv import load_dotenv
 from .constants import (
     DEFAULT_MAX_FILE_SIZE, DEFAULT_PORT, DEFAULT_HOST, 
@@ -19,8 +21,20 @@ class Config:
     """基础配置类"""
     
     # Flask配置
-    SECRET_KEY = os.environ.get('SECRET_KEY', secrets.token_hex(32))
+    # 仅在未配置SECRET_KEY时才生成随机密钥
+    SECRET_KEY = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', DEFAULT_MAX_FILE_SIZE))
+    MAX_CONTENT_LENGTH_MB = MAX_CONTENT_LENGTH // (1024 * 1024)
+    
+    # 413响应体在类加载时预先序列化，错误处理时直接返回
+    MAX_SIZE_ERROR_JSON = orjson.dumps({
+        'error': '文件大小超出限制',
+        'max_size': f"{MAX_CONTENT_LENGTH_MB}MB"
+    })
+    ENTITY_TOO_LARGE_ERROR_JSON = orjson.dumps({
+        'error': '上传文件过大',
+        'max_size': f"{MAX_CONTENT_LENGTH_MB}MB"
+    })
     
     # Dify API配置
     DIFY_API_BASE_URL = os.environ.get('DIFY_API_BASE_URL', 'http://localhost/v1')
@@ -33,6 +47,11 @@ class Config:
     
     # 文件上传配置
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', DEFAULT_UPLOAD_FOLDER)
+    # 上传中转目录（可指向tmpfs/本地SSD），为空时直接写入上传目录；
+    # 应与上传目录位于同一文件系统，否则移动文件会退化为复制
+    TEMP_UPLOAD_DIR = os.environ.get('TEMP_UPLOAD_DIR', '')
+    # 是否在文件信息中附带内容摘要（BLAKE2b），开启后每次获取文件信息会多读一遍文件
+    FILE_DIGEST_ENABLED = os.environ.get('FILE_DIGEST_ENABLED', 'False').lower() == 'true'
     
     # 日志配置
     LOG_LEVEL = os.environ.get('LOG_LEVEL', DEFAULT_LOG_LEVEL)
@@ -52,7 +71,7 @@ class Config:
     @classmethod
     def get_max_file_size_mb(cls):
         """获取最大文件大小（MB）"""
-        return cls.MAX_CONTENT_LENGTH // (1024 * 1024)
+        return cls.MAX_CONTENT_LENGTH_MB
     
     @classmethod
     def ensure_directories(cls):
@@ -94,10 +113,14 @@ config_map = {
 }
 
 
+@lru_cache(maxsize=None)
 def get_config(config_name=None):
     """
     获取配置对象
     
+    结果按 config_name 缓存：环境变量读取、配置校验和目录创建只在首次解析时执行，
+    之后的调用直接返回缓存的配置类。校验失败时抛出异常，不会被缓存。
+    
     Args:
         config_name: 配置名称，如果为None则从环境变量FLASK_ENV获取
         
@@ -2,17 +2,27 @@
 主路由处理模块
 定义应用的所有路由和视图函数
 """
-import json
+import atexit
 import io
+import logging
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from flask import Blueprint, render_template, request, jsonify, Response, current_app, send_file
+from functools import lru_cache
+from typing import Optional
+import orjson
+from flask import Blueprint, render_template, request, Response, send_file, stream_with_context
 from werkzeug.exceptions import RequestEntityTooLarge
 from docx import Document
+from docx.oxml import OxmlElement
 from docx.shared import Inches
 
 from config import get_config
-from services import FileService, DifyClient, ValidationService
-from utils import get_logger
+from config.constants import DOCX_BUILD_TIMEOUT, DOCX_POOL_WORKERS
+from services import FileService, ValidationService, get_dify_client
+from utils import get_logger, ojson
 from utils.exceptions import (
     FileValidationError, FileUploadError, DifyAPIError, 
     ValidationError, ServiceError
@@ -20,8 +30,165 @@ from utils.exceptions import (
 
 # 创建蓝图
 main_bp = Blueprint('main', __name__)
+
+# SSE响应头：禁止浏览器缓存与nginx缓冲，保证事件逐条即时下发
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'
+}
+
 logger = get_logger(__name__)
 
+# Word文档生成进程池，按需创建
+_doc_pool: Optional[ProcessPoolExecutor] = None
+_doc_pool_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _word_template_bytes() -> bytes:
+    """空白Word模板只加载一次，之后每次请求直接从内存字节创建文档"""
+    template_io = io.BytesIO()
+    Document().save(template_io)
+    return template_io.getvalue()
+
+
+def _build_paragraph(*runs):
+    """
+    直接构造 <w:p> 元素，避免逐个调用 add_paragraph
+    
+    Args:
+        runs: (文本, 是否加粗) 元组，文本中的换行会转换为段内换行符
+    """
+    p = OxmlElement('w:p')
+    for text, bold in runs:
+        r = OxmlElement('w:r')
+        if bold:
+            r.get_or_add_rPr().get_or_add_b()
+        r.text = text
+        p.append(r)
+    return p
+
+
+def _append_paragraphs(doc, paragraphs):
+    """将预先构造好的段落一次性插入正文末尾（sectPr 之前）"""
+    body = doc.element.body
+    sect_pr = body.sectPr
+    index = body.index(sect_pr) if sect_pr is not None else len(body)
+    body[index:index] = paragraphs
+
+
+def _build_docx_bytes(result_type, result_data) -> bytes:
+    """
+    生成审查结果Word文档并返回序列化后的字节
+    
+    在进程池的子进程中执行，必须保持为模块级函数以便pickle。
+    
+    Args:
+        result_type: 结果类型（primary/review）
+        result_data: 审查结果内容
+        
+    Returns:
+        bytes: docx文件内容
+    """
+    # 从缓存的模板字节创建Word文档
+    doc = Document(io.BytesIO(_word_template_bytes()))
+    
+    # 添加标题
+    title = '初审结果' if result_type == 'primary' else '复审结果'
+    doc.add_heading(title, 0)
+    
+    # 添加生成时间
+    doc.add_paragraph(f'生成时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
+    doc.add_paragraph('')  # 空行
+    
+    # 添加审查结果内容
+    doc.add_heading('审查结果详情', level=1)
+    
+    # 如果result_data是字符串，直接添加
+    if isinstance(result_data, str):
+        doc.add_paragraph(result_data)
+    # 如果是字典，格式化显示（所有键值对放在同一段落内，以换行分隔）
+    elif isinstance(result_data, dict):
+        runs = []
+        for key, value in result_data.items():
+            if runs:
+                runs.append(('\n', False))
+            runs.append((f'{key}: ', True))
+            runs.append((str(value), False))
+        _append_paragraphs(doc, [_build_paragraph(*runs)])
+    # 如果是列表，逐项显示（所有条目合并为一个段落，以换行分隔）
+    elif isinstance(result_data, list):
+        _append_paragraphs(doc, [
+            _build_paragraph(('\n'.join(f'• {item}' for item in result_data), False))
+        ])
+    else:
+        doc.add_paragraph(str(result_data))
+    
+    # 添加页脚信息
+    doc.add_paragraph('')
+    doc.add_paragraph('---')
+    doc.add_paragraph('本文档由文件合同审查系统自动生成')
+    
+    doc_io = io.BytesIO()
+    doc.save(doc_io)
+    return doc_io.getvalue()
+
+
+def _get_doc_pool() -> ProcessPoolExecutor:
+    """获取Word文档生成进程池（每个工作进程首次使用时创建，失效后重建）"""
+    global _doc_pool
+    if _doc_pool is None:
+        with _doc_pool_lock:
+            if _doc_pool is None:
+                _doc_pool = ProcessPoolExecutor(max_workers=DOCX_POOL_WORKERS)
+    return _doc_pool
+
+
+def _discard_doc_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    丢弃失效的进程池（子进程崩溃或任务超时），下次获取时重新创建
+    
+    超时任务仍占用旧池的工作进程，重建后新请求不再排在它们后面；
+    其他线程已经替换过的池不会被重复丢弃。
+    """
+    global _doc_pool
+    with _doc_pool_lock:
+        if _doc_pool is not pool:
+            return
+        _doc_pool = None
+    # Python 3.9+ 同时取消尚未开始的任务
+    if sys.version_info >= (3, 9):
+        pool.shutdown(wait=False, cancel_futures=True)
+    else:
+        pool.shutdown(wait=False)
+
+
+def _build_docx_in_pool(result_type: str, result_data) -> bytes:
+    """在进程池中生成Word文档；进程池已损坏时重建并重试一次"""
+    pool = _get_doc_pool()
+    try:
+        return pool.submit(_build_docx_bytes, result_type, result_data).result(timeout=DOCX_BUILD_TIMEOUT)
+    except BrokenProcessPool:
+        logger.warning("Word文档生成进程池已损坏，重建后重试")
+        _discard_doc_pool(pool)
+    except FutureTimeoutError:
+        _discard_doc_pool(pool)
+        raise
+    
+    pool = _get_doc_pool()
+    try:
+        return pool.submit(_build_docx_bytes, result_type, result_data).result(timeout=DOCX_BUILD_TIMEOUT)
+    except (BrokenProcessPool, FutureTimeoutError):
+        _discard_doc_pool(pool)
+        raise
+
+
+@atexit.register
+def _shutdown_doc_pool() -> None:
+    """进程退出时关闭当前的Word文档生成进程池"""
+    if _doc_pool is not None:
+        _doc_pool.shutdown(wait=False)
+
 
 @main_bp.route('/')
 def index():
@@ -31,7 +198,7 @@ def index():
         return render_template('index.html')
     except Exception as e:
         logger.error(f"主页渲染失败: {str(e)}")
-        return jsonify({'error': '页面加载失败'}), 500
+        return ojson({'error': '页面加载失败'}, 500)
 
 
 @main_bp.route('/upload', methods=['POST'])
@@ -46,83 +213,63 @@ def upload():
         contracting_party = request.form.get('contracting_party')
         category = request.form.get('category')
         
-        # 添加详细的调试日志
-        logger.debug(f"请求参数 - file: {file}, review_type: {review_type}, contracting_party: {contracting_party}, category: {category}")
-        logger.debug(f"request.files: {list(request.files.keys())}")
-        logger.debug(f"request.form: {dict(request.form)}")
+        # 添加详细的调试日志（仅在DEBUG级别下才拷贝表单与文件列表）
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("请求参数 - file: %s, review_type: %s, contracting_party: %s, category: %s",
+                         file, review_type, contracting_party, category)
+            logger.debug("request.files: %s", list(request.files.keys()))
+            logger.debug("request.form: %s", dict(request.form))
         
         # 验证请求参数
         ValidationService.validate_upload_request(review_type, contracting_party)
         
         logger.info(f"上传文件: {file.filename}, 类型: {review_type}, 当事方: {contracting_party}, 类别: {category}")
         
-        # 验证文件
+        # 使用固定的用户ID，与原始程序保持一致
+        user_id = 'demo_user'
+        
+        # 单次遍历完成文件校验并上传到Dify
         config = get_config()
-        is_valid, error_msg = ValidationService.validate_file(file, config.MAX_CONTENT_LENGTH)
-        if not is_valid:
-            logger.warning(f"文件验证失败: {error_msg}")
-            return jsonify({'error': error_msg}), 400
+        file_id, file_info = FileService.sniff_and_forward(
+            file, get_dify_client(), user_id, config.MAX_CONTENT_LENGTH
+        )
         
-        # 获取文件信息
-        file_info = FileService.get_file_info(file)
-        logger.debug(f"文件信息: {file_info}")
+        # 创建Dify文件输入格式
+        file_input = FileService.create_dify_file_input(file, file_id, file_info['type'])
         
-        # 验证文件类型支持
-        if not FileService.validate_file_type_support(file_info['type']):
-            raise FileValidationError(f"不支持的文件类型: {file_info['type']}")
+        # 准备聊天输入参数
+        inputs = {
+            'file': file_input,
+            'Category': '政策' if review_type == '文件审查' else '合同'
+        }
         
-        # 使用固定的用户ID，与原始程序保持一致
-        user_id = 'demo_user'
+        # 如果是合同审查，添加合同方信息
+        if review_type == '合同审查' and contracting_party:
+            inputs['Contracting_party'] = contracting_party
         
-        # 获取Dify客户端
-        dify_client = DifyClient(config.DIFY_API_TOKEN, config.DIFY_API_BASE_URL)
+        # 过滤None值
+        inputs = FileService.filter_none_values(inputs)
         
-        try:
-            # 上传文件到Dify
-            file_id = dify_client.upload_file(file, user_id)
-            
-            # 创建Dify文件输入格式
-            file_input = FileService.create_dify_file_input(file, file_id)
-            
-            # 准备聊天输入参数
-            inputs = {
-                'file': file_input,
-                'Category': '政策' if review_type == '文件审查' else '合同'
-            }
-            
-            # 如果是合同审查，添加合同方信息
-            if review_type == '合同审查' and contracting_party:
-                inputs['Contracting_party'] = contracting_party
-            
-            # 过滤None值
-            inputs = FileService.filter_none_values(inputs)
-            
-            logger.info(f"文件上传成功，准备开始审查: {file.filename}")
-            
-            # 返回格式与原始程序保持一致
-            from flask import Response
-            import json
-            return Response(json.dumps({
-                'inputs': inputs,
-                'user_id': user_id
-            }, ensure_ascii=False), mimetype='application/json')
-            
-        finally:
-            # 关闭Dify客户端连接
-            dify_client.close()
-            
+        logger.info(f"文件上传成功，准备开始审查: {file.filename}")
+        
+        # 返回格式与原始程序保持一致
+        return ojson({
+            'inputs': inputs,
+            'user_id': user_id
+        })
+
     except FileValidationError as e:
         logger.warning(f"文件验证失败: {str(e)}")
-        return jsonify({'error': str(e)}), 400
+        return ojson({'error': str(e)}, 400)
     except FileUploadError as e:
         logger.error(f"文件上传失败: {str(e)}")
-        return jsonify({'error': f'文件上传失败: {str(e)}'}), 500
+        return ojson({'error': f'文件上传失败: {str(e)}'}, 500)
     except ValidationError as e:
         logger.warning(f"参数验证失败: {str(e)}")
-        return jsonify({'error': str(e)}), 400
+        return ojson({'error': str(e)}, 400)
     except Exception as e:
         logger.error(f"上传处理未知错误: {str(e)}")
-        return jsonify({'error': '文件上传失败，请稍后重试'}), 500
+        return ojson({'error': '文件上传失败，请稍后重试'}, 500)
 
 
 @main_bp.route('/stream_chat', methods=['POST'])
@@ -132,18 +279,23 @@ def stream_chat():
         logger.info("开始处理流式聊天请求")
         
         # 获取请求数据
-        data = request.get_json()
+        try:
+            data = orjson.loads(request.get_data(cache=False))
+        except orjson.JSONDecodeError:
+            return ojson({'error': '请求数据不是有效的JSON'}, 400)
+        if not isinstance(data, dict):
+            return ojson({'error': '请求数据必须是JSON对象'}, 400)
         inputs = data.get('inputs', {})
         user_id = data.get('user_id', '')
         
         # 验证请求参数
         ValidationService.validate_stream_chat_request(inputs, user_id)
         
-        logger.info(f"流式聊天输入: {json.dumps(inputs, ensure_ascii=False)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("流式聊天输入: %s", orjson.dumps(inputs).decode())
         
-        # 获取Dify客户端
-        config = get_config()
-        dify_client = DifyClient(config.DIFY_API_TOKEN, config.DIFY_API_BASE_URL)
+        # 获取共享的Dify客户端
+        dify_client = get_dify_client()
         
         def generate_response():
             """生成流式响应"""
@@ -155,28 +307,27 @@ def stream_chat():
                         
             except DifyAPIError as e:
                 logger.error(f"Dify API错误: {str(e)}")
-                error_response = f"data: {json.dumps({'error': str(e)}, ensure_ascii=False)}\n\n"
+                error_response = b'data: ' + orjson.dumps({'error': str(e)}) + b'\n\n'
                 yield error_response
             except Exception as e:
                 logger.error(f"流式聊天未知错误: {str(e)}")
-                error_response = f"data: {json.dumps({'error': '聊天服务暂时不可用'}, ensure_ascii=False)}\n\n"
+                error_response = b'data: ' + orjson.dumps({'error': '聊天服务暂时不可用'}) + b'\n\n'
                 yield error_response
-            finally:
-                # 关闭Dify客户端连接
-                dify_client.close()
         
-        from flask import stream_with_context
-        return Response(
+        response = Response(
             stream_with_context(generate_response()),
-            mimetype='text/event-stream'
-               )
+            mimetype='text/event-stream',
+            headers=SSE_HEADERS
+        )
+        response.implicit_sequence_conversion = False
+        return response
         
     except ValidationError as e:
         logger.warning(f"流式聊天参数验证失败: {str(e)}")
-        return jsonify({'error': str(e)}), 400
+        return ojson({'error': str(e)}, 400)
     except Exception as e:
         logger.error(f"流式聊天处理未知错误: {str(e)}")
-        return jsonify({'error': '聊天服务暂时不可用，请稍后重试'}), 500
+        return ojson({'error': '聊天服务暂时不可用，请稍后重试'}, 500)
 
 
 @main_bp.route('/download_word', methods=['POST'])
@@ -186,61 +337,33 @@ def download_word():
         logger.info("开始处理Word文档下载请求")
         
         # 获取请求数据
-        data = request.get_json()
+        try:
+            data = orjson.loads(request.get_data(cache=False))
+        except orjson.JSONDecodeError:
+            return ojson({'error': '请求数据不是有效的JSON'}, 400)
+        if not isinstance(data, dict):
+            return ojson({'error': '请求数据必须是JSON对象'}, 400)
         if not data:
-            return jsonify({'error': '请求数据为空'}), 400
+            return ojson({'error': '请求数据为空'}, 400)
         
         result_type = data.get('result_type')
         result_data = data.get('result_data')
         filename = data.get('filename', 'audit_result.docx')
         
         if not result_type or not result_data:
-            return jsonify({'error': '缺少必要参数'}), 400
-        
-        # 创建Word文档
-        doc = Document()
-        
-        # 添加标题
-        title = '初审结果' if result_type == 'primary' else '复审结果'
-        doc.add_heading(title, 0)
-        
-        # 添加生成时间
-        doc.add_paragraph(f'生成时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
-        doc.add_paragraph('')  # 空行
-        
-        # 添加审查结果内容
-        doc.add_heading('审查结果详情', level=1)
-        
-        # 如果result_data是字符串，直接添加
-        if isinstance(result_data, str):
-            doc.add_paragraph(result_data)
-        # 如果是字典，格式化显示
-        elif isinstance(result_data, dict):
-            for key, value in result_data.items():
-                p = doc.add_paragraph()
-                p.add_run(f'{key}: ').bold = True
-                p.add_run(str(value))
-        # 如果是列表，逐项显示
-        elif isinstance(result_data, list):
-            for item in result_data:
-                doc.add_paragraph(f'• {str(item)}')
-        else:
-            doc.add_paragraph(str(result_data))
-        
-        # 添加页脚信息
-        doc.add_paragraph('')
-        doc.add_paragraph('---')
-        doc.add_paragraph('本文档由文件合同审查系统自动生成')
-        
-        # 将文档保存到内存
-        doc_io = io.BytesIO()
-        doc.save(doc_io)
-        doc_io.seek(0)
+            return ojson({'error': '缺少必要参数'}, 400)
+        
+        # 在进程池中生成并序列化文档，避免长时间占用当前工作线程的GIL
+        try:
+            doc_bytes = _build_docx_in_pool(result_type, result_data)
+        except FutureTimeoutError:
+            logger.error(f"Word文档生成超时（{DOCX_BUILD_TIMEOUT}秒）: {filename}")
+            return ojson({'error': 'Word文档生成超时，请稍后重试'}, 504)
         
         logger.info(f"Word文档生成成功: {filename}")
         
         return send_file(
-            doc_io,
+            io.BytesIO(doc_bytes),
             as_attachment=True,
             download_name=filename,
             mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
@@ -248,7 +371,7 @@ def download_word():
         
     except Exception as e:
         logger.error(f"Word文档生成失败: {str(e)}")
-        return jsonify({'error': 'Word文档生成失败'}), 500
+        return ojson({'error': 'Word文档生成失败'}, 500)
 
 
 @main_bp.route('/health', methods=['GET'])
@@ -257,13 +380,8 @@ def health_check():
     try:
         logger.debug("执行健康检查")
         
-        # 检查配置
-        config = get_config()
-        
         # 检查Dify API连接
-        dify_client = DifyClient(config.DIFY_API_TOKEN, config.DIFY_API_BASE_URL)
-        dify_healthy = dify_client.health_check()
-        dify_client.close()
+        dify_healthy = get_dify_client().health_check()
         
         health_status = {
             'status': 'healthy' if dify_healthy else 'degraded',
@@ -280,14 +398,14 @@ def health_check():
         status_code = 200 if dify_healthy else 503
         
         logger.info(f"健康检查完成: {health_status['status']}")
-        return jsonify(health_status), status_code
+        return ojson(health_status, status_code)
         
     except Exception as e:
         logger.error(f"健康检查失败: {str(e)}")
-        return jsonify({
+        return ojson({
             'status': 'unhealthy',
             'error': str(e)
-        }), 503
+        }, 503)
 
 
 # 错误处理器
@@ -295,51 +413,45 @@ def health_check():
 def file_too_large(error):
     """文件过大错误处理"""
     logger.warning("文件大小超出限制")
-    return jsonify({
-        'error': '文件大小超出限制',
-        'max_size': f"{current_app.config.get('MAX_CONTENT_LENGTH', 0) // (1024*1024)}MB"
-    }), 413
+    return Response(get_config().MAX_SIZE_ERROR_JSON, status=413, mimetype='application/json')
 
 
 @main_bp.errorhandler(400)
 def bad_request(error):
     """错误请求处理"""
     logger.warning(f"错误请求: {str(error)}")
-    return jsonify({
+    return ojson({
         'error': '请求格式错误',
         'message': str(error.description) if hasattr(error, 'description') else '请求无效'
-    }), 400
+    }, 400)
 
 
 @main_bp.errorhandler(500)
 def internal_error(error):
     """内部服务器错误处理"""
     logger.error(f"内部服务器错误: {str(error)}")
-    return jsonify({
+    return ojson({
         'error': '服务器内部错误',
         'message': '服务暂时不可用，请稍后重试'
-    }), 500
+    }, 500)
 
 
 @main_bp.errorhandler(RequestEntityTooLarge)
 def handle_file_too_large(error):
     """处理文件过大异常"""
     logger.warning("上传文件过大")
-    return jsonify({
-        'error': '上传文件过大',
-        'max_size': f"{current_app.config.get('MAX_CONTENT_LENGTH', 0) // (1024*1024)}MB"
-    }), 413
+    return Response(get_config().ENTITY_TOO_LARGE_ERROR_JSON, status=413, mimetype='application/json')
 
 
 # 请求前后处理
 @main_bp.before_request
 def before_request():
     """请求前处理"""
-    logger.debug(f"收到请求: {request.method} {request.path}")
+    logger.debug("收到请求: %s %s", request.method, request.path)
 
 
 @main_bp.after_request
 def after_request(response):
     """请求后处理"""
-    logger.debug(f"响应状态: {response.status_code}")
+    logger.debug("响应状态: %s", response.status_code)
     return response
\ No newline at end of file
@@ -4,7 +4,7 @@
 """
 
 from .file_service import FileService
-from .dify_client import DifyClient
+from .dify_client import DifyClient, get_dify_client
 from .validation import ValidationService
 
-__all__ = ['FileService', 'DifyClient', 'ValidationService']
\ No newline at end of file
+__all__ = ['FileService', 'DifyClient', 'get_dify_client', 'ValidationService']
\ No newline at end of file
@@ -2,17 +2,73 @@
 Dify API客户端模块
 提供与Dify API的交互功能
 """
-import json
+import atexit
+import logging
+import threading
+import time
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# requests-toolbelt 可选：可用时以流式 multipart 上传文件，避免整体缓冲请求体
+try:
+    from requests_toolbelt.multipart.encoder import MultipartEncoder
+    MULTIPART_STREAMING_AVAILABLE = True
+except ImportError:
+    MultipartEncoder = None
+    MULTIPART_STREAMING_AVAILABLE = False
 from typing import Dict, Any, Iterator, Optional
+from flask import current_app
 from werkzeug.datastructures import FileStorage
 
-from config.constants import API_TIMEOUT, CHUNK_SIZE
+from config import get_config
+from config.constants import (
+    API_TIMEOUT, CHUNK_SIZE, SSE_KEEPALIVE_INTERVAL,
+    HEALTH_CHECK_TIMEOUT, HEALTH_CHECK_TTL
+)
 from utils.exceptions import DifyAPIError, FileUploadError
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# SSE 帧前后缀
+_DATA_PREFIX = b'data:'
+_DATA_PREFIX_LEN = len(_DATA_PREFIX)
+_SSE_DATA = b'data: '
+_SSE_END = b'\n\n'
+# SSE 注释帧，客户端会忽略，仅用于保持连接活跃
+_SSE_KEEPALIVE = b': keepalive\n\n'
+
+
+def _iter_sse_lines(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """
+    将响应分块切分为SSE行
+    
+    SSE 只以 \n 分隔字段，使用可复用的 bytearray 缓冲区逐块查找换行，
+    每块处理完后一次性丢弃已消费的前缀，避免 iter_lines 按多种换行符反复 split。
+    行尾的 \r 交由调用方 strip 处理。
+    
+    Args:
+        chunks: 响应字节块迭代器
+        
+    Yields:
+        bytes: 不含换行符的单行数据
+    """
+    buf = bytearray()
+    for chunk in chunks:
+        buf += chunk
+        start = 0
+        idx = buf.find(b'\n')
+        while idx != -1:
+            yield bytes(buf[start:idx])
+            start = idx + 1
+            idx = buf.find(b'\n', start)
+        if start:
+            del buf[:start]
+    if buf:
+        yield bytes(buf)
+
 
 class DifyClient:
     """Dify API客户端类"""
@@ -27,11 +83,35 @@ class DifyClient:
         """
         self.api_token = api_token
         self.base_url = base_url.rstrip('/')
+        # 各接口完整URL在初始化时拼接一次
+        self._url_upload = f"{self.base_url}/files/upload"
+        self._url_chat = f"{self.base_url}/chat-messages"
+        self._url_messages = f"{self.base_url}/messages"
+        self._url_root = f"{self.base_url}/"
         self.session = requests.Session()
         self.session.headers.update({
             'Authorization': f'Bearer {api_token}',
             'User-Agent': 'CensorSystem/1.0'
         })
+        # 连接池复用与网络错误重试（POST请求仅在连接阶段失败时重试）
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # 健康检查单独使用不重试的会话，保证探测在 HEALTH_CHECK_TIMEOUT 内结束
+        self._health_session = requests.Session()
+        self._health_session.headers.update(self.session.headers)
+        health_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+        self._health_session.mount('http://', health_adapter)
+        self._health_session.mount('https://', health_adapter)
+        
+        # 健康检查结果缓存：(检查时间, 是否健康)
+        self._last_health: Optional[tuple] = None
+        self._health_lock = threading.Lock()
         
         logger.info(f"Dify客户端初始化完成: {base_url}")
     
@@ -50,28 +130,32 @@ class DifyClient:
             FileUploadError: 文件上传失败
         """
         try:
-            url = f"{self.base_url}/files/upload"
+            url = self._url_upload
             
             # 确保文件指针在开头
             file.seek(0)
             
             # 准备文件数据
-            files = {
-                'file': (file.filename, file.stream, file.mimetype or 'application/octet-stream')
-            }
-            
-            data = {
-                'user': user_id
-            }
+            file_field = (file.filename, file.stream, file.mimetype or 'application/octet-stream')
             
             logger.info(f"开始上传文件到Dify: {file.filename}")
             
-            response = self.session.post(
-                url,
-                files=files,
-                data=data,
-                timeout=API_TIMEOUT
-            )
+            if MULTIPART_STREAMING_AVAILABLE:
+                # 流式编码multipart请求体，内存占用与文件大小无关
+                encoder = MultipartEncoder(fields={'user': user_id, 'file': file_field})
+                response = self.session.post(
+                    url,
+                    data=encoder,
+                    headers={'Content-Type': encoder.content_type},
+                    timeout=API_TIMEOUT
+                )
+            else:
+                response = self.session.post(
+                    url,
+                    files={'file': file_field},
+                    data={'user': user_id},
+                    timeout=API_TIMEOUT
+                )
             
             if response.status_code != 201:
                 error_msg = f"文件上传失败: HTTP {response.status_code}"
@@ -103,7 +187,7 @@ class DifyClient:
             logger.error(f"文件上传未知错误: {str(e)}")
             raise FileUploadError(f"上传失败: {str(e)}")
     
-    def chat_stream(self, inputs: Dict[str, Any], user_id: str = "default_user") -> Iterator[str]:
+    def chat_stream(self, inputs: Dict[str, Any], user_id: str = "default_user") -> Iterator[bytes]:
         """
         流式聊天
         
@@ -112,13 +196,13 @@ class DifyClient:
             user_id: 用户ID
             
         Yields:
-            str: 流式响应数据
+            bytes: SSE格式的流式响应数据
             
         Raises:
             DifyAPIError: API调用失败
         """
         try:
-            url = f"{self.base_url}/chat-messages"
+            url = self._url_chat
             
             # 使用简单的查询，与原始程序保持一致
             query = "请审查"
@@ -131,7 +215,8 @@ class DifyClient:
                 'user': user_id
             }
             
-            logger.info(f"开始流式聊天请求: {json.dumps(inputs, ensure_ascii=False)}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("开始流式聊天请求: %s", orjson.dumps(inputs).decode())
             
             response = self.session.post(
                 url,
@@ -152,55 +237,29 @@ class DifyClient:
                 logger.error(f"{error_msg}, 响应: {response.text}")
                 raise DifyAPIError(error_msg)
             
-            # 处理流式响应
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        if line.startswith(b'data:'):
-                            content = line[5:].decode('utf-8').strip()
-                            
-                            # 跳过空内容
-                            if not content:
-                                continue
-                                
-                            logger.debug(f"接收到流式数据: {content}")
-                            
-                            # 尝试解析JSON来查看具体内容
-                            try:
-                                parsed_data = json.loads(content)
-                                event_type = parsed_data.get('event', 'unknown')
-                                logger.debug(f"事件类型: {event_type}")
-                                
-                                # 根据事件类型进行不同处理
-                                if event_type == 'workflow_started':
-                                    logger.info("工作流开始执行")
-                                elif event_type == 'node_started':
-                                    data = parsed_data.get('data', {})
-                                    logger.info(f"节点开始: {data.get('title', 'Unknown')}")
-                                elif event_type == 'node_finished':
-                                    data = parsed_data.get('data', {})
-                                    logger.info(f"节点完成: {data.get('title', 'Unknown')} - 状态: {data.get('status', 'unknown')}")
-                                    if data.get('outputs'):
-                                        logger.debug(f"节点输出: {data.get('outputs')}")
-                                elif event_type == 'workflow_finished':
-                                    data = parsed_data.get('data', {})
-                                    logger.info(f"工作流完成 - 状态: {data.get('status', 'unknown')}")
-                                elif event_type == 'message':
-                                    logger.debug(f"消息块: {parsed_data.get('answer', '')}")
-                                elif event_type == 'message_end':
-                                    logger.info("消息结束")
-                                elif event_type == 'error':
-                                    logger.error(f"流式响应错误: {parsed_data.get('message', 'Unknown error')}")
-                                    
-                            except json.JSONDecodeError:
-                                logger.debug(f"非JSON格式数据: {content}")
-                            except Exception as e:
-                                logger.warning(f"解析流式数据失败: {str(e)}")
-                                
-                            yield f"data: {content}\n\n"
-                    except UnicodeDecodeError as e:
-                        logger.warning(f"解码响应行失败: {str(e)}")
-                        continue
+            # 处理流式响应：原样转发 data 行，仅在需要记录日志时才解析事件
+            log_events = logger.isEnabledFor(logging.INFO)
+            last_yield = time.monotonic()
+            for line in _iter_sse_lines(response.iter_content(chunk_size=CHUNK_SIZE)):
+                if not line.startswith(_DATA_PREFIX):
+                    # 上游长时间只有 ping/空行时补发心跳，避免代理因空闲断开连接
+                    now = time.monotonic()
+                    if now - last_yield >= SSE_KEEPALIVE_INTERVAL:
+                        last_yield = now
+                        yield _SSE_KEEPALIVE
+                    continue
+                content = line[_DATA_PREFIX_LEN:].strip()
+                
+                # 跳过空内容
+                if not content:
+                    continue
+                
+                # 生产环境（WARNING级别）只解析可能的错误事件，其余数据直接转发
+                if log_events or b'"error"' in content:
+                    self._log_stream_event(content)
+                
+                last_yield = time.monotonic()
+                yield b''.join((_SSE_DATA, content, _SSE_END))
             
             logger.info("流式聊天请求完成")
             
@@ -213,6 +272,49 @@ class DifyClient:
             logger.error(f"聊天请求未知错误: {str(e)}")
             raise DifyAPIError(f"聊天失败: {str(e)}")
     
+    def _log_stream_event(self, content: bytes):
+        """
+        解析单条流式事件并按事件类型记录日志
+        
+        Args:
+            content: data 行去掉前缀后的原始字节
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("接收到流式数据: %s", content.decode('utf-8', errors='replace'))
+        
+        try:
+            parsed_data = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            logger.debug("非JSON格式数据: %s", content)
+            return
+        
+        try:
+            event_type = parsed_data.get('event', 'unknown')
+            logger.debug("事件类型: %s", event_type)
+            
+            # 根据事件类型进行不同处理
+            if event_type == 'workflow_started':
+                logger.info("工作流开始执行")
+            elif event_type == 'node_started':
+                data = parsed_data.get('data', {})
+                logger.info("节点开始: %s", data.get('title', 'Unknown'))
+            elif event_type == 'node_finished':
+                data = parsed_data.get('data', {})
+                logger.info("节点完成: %s - 状态: %s", data.get('title', 'Unknown'), data.get('status', 'unknown'))
+                if data.get('outputs'):
+                    logger.debug("节点输出: %s", data.get('outputs'))
+            elif event_type == 'workflow_finished':
+                data = parsed_data.get('data', {})
+                logger.info("工作流完成 - 状态: %s", data.get('status', 'unknown'))
+            elif event_type == 'message':
+                logger.debug("消息块: %s", parsed_data.get('answer', ''))
+            elif event_type == 'message_end':
+                logger.info("消息结束")
+            elif event_type == 'error':
+                logger.error("流式响应错误: %s", parsed_data.get('message', 'Unknown error'))
+        except Exception as e:
+            logger.warning(f"解析流式数据失败: {str(e)}")
+    
     def chat_blocking(self, inputs: Dict[str, Any], user_id: str = "default_user") -> Dict[str, Any]:
         """
         阻塞式聊天
@@ -228,7 +330,7 @@ class DifyClient:
             DifyAPIError: API调用失败
         """
         try:
-            url = f"{self.base_url}/chat-messages"
+            url = self._url_chat
             
             # 使用简单的查询，与原始程序保持一致
             query = "请审查"
@@ -241,7 +343,8 @@ class DifyClient:
                 'user': user_id
             }
             
-            logger.info(f"开始阻塞式聊天请求: {json.dumps(inputs, ensure_ascii=False)}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("开始阻塞式聊天请求: %s", orjson.dumps(inputs).decode())
             
             response = self.session.post(
                 url,
@@ -289,7 +392,7 @@ class DifyClient:
             DifyAPIError: API调用失败
         """
         try:
-            url = f"{self.base_url}/messages"
+            url = self._url_messages
             
             params = {
                 'conversation_id': conversation_id,
@@ -333,14 +436,37 @@ class DifyClient:
         """
         健康检查
         
+        结果在 HEALTH_CHECK_TTL 秒内复用，并发的检查请求只有一个会访问上游。
+        
+        Returns:
+            bool: 是否健康
+        """
+        cached = self._last_health
+        if cached and time.monotonic() - cached[0] < HEALTH_CHECK_TTL:
+            return cached[1]
+        
+        with self._health_lock:
+            # 等锁期间可能已有其他线程完成检查
+            cached = self._last_health
+            if cached and time.monotonic() - cached[0] < HEALTH_CHECK_TTL:
+                return cached[1]
+            
+            is_healthy = self._probe_health()
+            self._last_health = (time.monotonic(), is_healthy)
+            return is_healthy
+    
+    def _probe_health(self) -> bool:
+        """
+        向Dify API发送HEAD请求探测可用性
+        
         Returns:
             bool: 是否健康
         """
         try:
-            # 尝试访问API根路径或健康检查端点
-            url = f"{self.base_url}/"
+            # 尝试访问API根路径，HEAD请求不传输响应体
+            url = self._url_root
             
-            response = self.session.get(url, timeout=5)
+            response = self._health_session.head(url, timeout=HEALTH_CHECK_TIMEOUT, allow_redirects=False)
             
             # 根据状态码判断健康状态
             is_healthy = response.status_code < 500
@@ -360,6 +486,33 @@ class DifyClient:
         """关闭客户端连接"""
         try:
             self.session.close()
+            self._health_session.close()
             logger.debug("Dify客户端连接已关闭")
         except Exception as e:
-            logger.warning(f"关闭Dify客户端连接失败: {str(e)}")
\ No newline at end of file
+            logger.warning(f"关闭Dify客户端连接失败: {str(e)}")
+
+
+_client_lock = threading.Lock()
+
+
+def get_dify_client() -> DifyClient:
+    """
+    获取当前应用共享的Dify客户端
+    
+    客户端在首次调用时按配置创建并保存在 app.extensions 中，
+    同一进程内的请求复用其连接池，进程退出时统一关闭。
+    
+    Returns:
+        DifyClient: 共享的Dify客户端
+    """
+    app = current_app._get_current_object()
+    client = app.extensions.get('dify_client')
+    if client is None:
+        with _client_lock:
+            client = app.extensions.get('dify_client')
+            if client is None:
+                config = get_config()
+                client = DifyClient(config.DIFY_API_TOKEN, config.DIFY_API_BASE_URL)
+                app.extensions['dify_client'] = client
+                atexit.register(client.close)
+    return client
@@ -4,17 +4,92 @@
 """
 import os
 import secrets
+import shutil
+import tempfile
+from tempfile import SpooledTemporaryFile
 import codecs
-from typing import Dict, Any, Tuple
+from collections import deque
+from contextlib import suppress
+from typing import Dict, Any, Optional, Tuple
 from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
 
-from config.constants import EXT_TYPE_MAP, EXT_FILETYPE_MAP, SUPPORTED_FILE_TYPES
+from config import get_config
+from config.constants import EXT_FILETYPE_MAP, MIME_TO_FILETYPE, SUPPORTED_FILE_TYPES
 from utils.exceptions import FileUploadError, UnsupportedFileTypeError
+from utils.file_utils import get_file_size, get_file_digest
 from utils.logger import get_logger
+from .validation import ValidationService
 
 logger = get_logger(__name__)
 
+# 查表用常量统一规范化：类型集合为frozenset，扩展名键统一为小写
+_SUPPORTED_FILE_TYPES = frozenset(SUPPORTED_FILE_TYPES)
+_EXT_FILETYPE_MAP = {ext.lower(): file_type for ext, file_type in EXT_FILETYPE_MAP.items()}
+
+# 预先获取解码函数，避免每次调用 codecs.decode 时重新查找编解码器
+_unicode_escape_decode = codecs.getdecoder('unicode_escape')
+
+# 需要继续向下遍历的容器类型
+_CONTAINER_TYPES = (dict, list)
+
+# 已创建的上传目录
+_ready_upload_folders = set()
+
+def _safe_suffix(filename: str) -> str:
+    """解析文件名的扩展名并做安全处理，返回小写的 .ext 或空字符串"""
+    _, dot, ext = filename.rpartition('.')
+    ext = secure_filename(ext) if dot else ''
+    return f'.{ext.lower()}' if ext else ''
+
+
+# 内存流回退复制时使用的缓冲区大小
+_COPY_BUFFER_SIZE = 1 << 20
+
+
+def _copy_upload(file: FileStorage, dst) -> None:
+    """
+    将上传文件内容写入目标文件
+    
+    上传内容已落盘为临时文件时使用 os.sendfile 在内核中直接复制，
+    否则以 1MB 缓冲区复制，减少 Python 层的读写往返次数。
+    尚在内存中的 SpooledTemporaryFile 调用 fileno() 会强制落盘，直接走缓冲复制。
+    """
+    src = file.stream
+    if isinstance(src, SpooledTemporaryFile) and not getattr(src, '_rolled', False):
+        src.seek(0)
+        shutil.copyfileobj(src, dst, _COPY_BUFFER_SIZE)
+        return
+    try:
+        src_fd = src.fileno()
+        dst.flush()
+        dst_fd = dst.fileno()
+        offset, remaining = 0, os.fstat(src_fd).st_size
+        while remaining > 0:
+            sent = os.sendfile(dst_fd, src_fd, offset, remaining)
+            if sent == 0:
+                break
+            offset += sent
+            remaining -= sent
+        return
+    except (AttributeError, OSError, ValueError):
+        # BytesIO 等内存流没有文件描述符，回退到缓冲复制（丢弃可能已写入的部分内容）
+        dst.seek(0)
+        dst.truncate()
+    src.seek(0)
+    shutil.copyfileobj(src, dst, _COPY_BUFFER_SIZE)
+
+
+def _decode_unicode_escape(value: str) -> str:
+    """解码单个字符串中的Unicode转义，失败时原样返回"""
+    # 不含反斜杠的字符串没有转义序列，直接返回
+    if '\\' not in value:
+        return value
+    try:
+        return _unicode_escape_decode(value)[0]
+    except Exception:
+        return value
+
 
 class FileService:
     """文件处理服务类"""
@@ -30,37 +105,33 @@ class FileService:
         Returns:
             str: 文件类型 (document, image, audio, video, custom)
         """
-        try:
-            # 首先尝试从MIME类型推测
-            mime = getattr(file, 'mimetype', None)
-            ext = EXT_TYPE_MAP.get(mime)
-            
-            # 如果MIME类型推测失败，从文件扩展名推测
-            if not ext and '.' in file.filename:
-                ext = file.filename.rsplit('.', 1)[-1].lower()
-            
-            file_type = EXT_FILETYPE_MAP.get(ext, 'custom')
-            
-            logger.debug(f"文件类型推测: {file.filename} -> {file_type} (ext: {ext}, mime: {mime})")
-            return file_type
-            
-        except Exception as e:
-            logger.warning(f"文件类型推测失败: {str(e)}")
-            return 'custom'
+        # 首先从MIME类型推测，与 Dify-artilcle-writing-sys/docx_utils.py 的 guess_type 优先级一致
+        file_type = MIME_TO_FILETYPE.get(file.mimetype)
+        
+        # MIME类型未知时再从文件扩展名推测
+        if file_type is None:
+            _, dot, ext = (file.filename or '').rpartition('.')
+            file_type = _EXT_FILETYPE_MAP.get(ext.lower(), 'custom') if dot else 'custom'
+        
+        logger.debug("文件类型推测: %s -> %s", file.filename, file_type)
+        return file_type
     
     @staticmethod
-    def create_dify_file_input(file: FileStorage, file_id: str) -> Dict[str, Any]:
+    def create_dify_file_input(file: FileStorage, file_id: str,
+                               file_type: Optional[str] = None) -> Dict[str, Any]:
         """
         创建Dify API所需的文件输入格式
         
         Args:
             file: 文件对象
             file_id: 文件ID
+            file_type: 已推测的文件类型，为空时重新推测
             
         Returns:
             Dict[str, Any]: Dify文件输入格式
         """
-        file_type = FileService.guess_file_type(file)
+        if file_type is None:
+            file_type = FileService.guess_file_type(file)
         
         return {
             'type': file_type,
@@ -79,15 +150,16 @@ class FileService:
         Returns:
             bool: 是否支持
         """
-        return file_type in SUPPORTED_FILE_TYPES
+        return file_type in _SUPPORTED_FILE_TYPES
     
     @staticmethod
-    def generate_secure_filename(original_filename: str) -> str:
+    def generate_secure_filename(original_filename: str, ext: Optional[str] = None) -> str:
         """
         生成安全的文件名
         
         Args:
             original_filename: 原始文件名
+            ext: 调用方已解析的扩展名（以.开头或为空字符串），为None时从原始文件名解析
             
         Returns:
             str: 安全的文件名
@@ -96,18 +168,45 @@ class FileService:
             secure_name = secure_filename(original_filename)
             if not secure_name:
                 # 如果secure_filename返回空字符串，生成一个随机文件名
-                ext = ''
-                if '.' in original_filename:
-                    ext = '.' + original_filename.rsplit('.', 1)[-1].lower()
+                if ext is None:
+                    ext = _safe_suffix(original_filename)
                 secure_name = f"upload_{secrets.token_hex(8)}{ext}"
             
-            logger.debug(f"生成安全文件名: {original_filename} -> {secure_name}")
+            logger.debug("生成安全文件名: %s -> %s", original_filename, secure_name)
             return secure_name
             
         except Exception as e:
-            logger.warning(f"生成安全文件名失败: {str(e)}")
+            logger.warning("生成安全文件名失败: %s", e)
             return f"upload_{secrets.token_hex(8)}.tmp"
     
+    @staticmethod
+    def ensure_upload_folder(upload_folder: str) -> None:
+        """
+        确保上传目录存在
+        
+        已确认存在的目录会被记录，之后的调用不再触发文件系统操作。
+        
+        Args:
+            upload_folder: 上传目录
+        """
+        if upload_folder in _ready_upload_folders:
+            return
+        os.makedirs(upload_folder, exist_ok=True)
+        _ready_upload_folders.add(upload_folder)
+    
+    @staticmethod
+    def get_temp_dir(upload_folder: str) -> str:
+        """
+        获取上传文件的中转写入目录
+        
+        Args:
+            upload_folder: 上传目录
+            
+        Returns:
+            str: 配置了 TEMP_UPLOAD_DIR 时返回该目录，否则返回上传目录
+        """
+        return get_config().TEMP_UPLOAD_DIR or upload_folder
+    
     @staticmethod
     def save_temp_file(file: FileStorage, upload_folder: str) -> str:
         """
@@ -124,21 +223,32 @@ class FileService:
             FileUploadError: 文件保存失败
         """
         try:
-            # 确保上传目录存在
-            os.makedirs(upload_folder, exist_ok=True)
+            # 确保上传目录与中转目录存在（每个目录只创建一次）
+            FileService.ensure_upload_folder(upload_folder)
+            temp_dir = FileService.get_temp_dir(upload_folder)
+            FileService.ensure_upload_folder(temp_dir)
             
-            # 生成安全的文件名
-            secure_name = FileService.generate_secure_filename(file.filename)
-            temp_path = os.path.join(upload_folder, secure_name)
+            # 只保留经过安全处理的扩展名，唯一文件名由系统原子分配，避免并发上传同名覆盖
+            with tempfile.NamedTemporaryFile(dir=temp_dir, prefix='upload_',
+                                             suffix=_safe_suffix(file.filename),
+                                             delete=False) as tmp:
+                temp_path = tmp.name
+                _copy_upload(file, tmp)
             
-            # 保存文件
-            file.save(temp_path)
+            # 写入完成后移动到上传目录：同一文件系统下为原子重命名，跨文件系统时回退为复制
+            if temp_dir != upload_folder:
+                final_path = os.path.join(upload_folder, os.path.basename(temp_path))
+                try:
+                    os.replace(temp_path, final_path)
+                except OSError:
+                    shutil.move(temp_path, final_path)
+                temp_path = final_path
             
-            logger.info(f"临时文件保存成功: {temp_path}")
+            logger.info("临时文件保存成功: %s", temp_path)
             return temp_path
             
         except Exception as e:
-            logger.error(f"保存临时文件失败: {str(e)}")
+            logger.error("保存临时文件失败: %s", e)
             raise FileUploadError(f"文件保存失败: {str(e)}")
     
     @staticmethod
@@ -150,16 +260,19 @@ class FileService:
             file_path: 文件路径
         """
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.debug(f"临时文件清理成功: {file_path}")
-        except Exception as e:
-            logger.warning(f"清理临时文件失败: {file_path}, 错误: {str(e)}")
+            # 直接删除，文件不存在时忽略，省去一次stat且没有检查与删除之间的竞态
+            with suppress(FileNotFoundError):
+                os.unlink(file_path)
+                logger.debug("临时文件清理成功: %s", file_path)
+        except OSError as e:
+            logger.warning("清理临时文件失败: %s, 错误: %s", file_path, e)
     
     @staticmethod
     def decode_unicode_dict(data: Any) -> Any:
         """
-        递归解码Unicode字典
+        解码嵌套结构中的Unicode转义字符串
+        
+        使用显式栈迭代遍历，字典和列表原地更新，不再为每一层重新构造容器。
         
         Args:
             data: 要解码的数据
@@ -167,76 +280,92 @@ class FileService:
         Returns:
             Any: 解码后的数据
         """
-        try:
-            if isinstance(data, dict):
-                return {k: FileService.decode_unicode_dict(v) for k, v in data.items()}
-            elif isinstance(data, list):
-                return [FileService.decode_unicode_dict(i) for i in data]
-            elif isinstance(data, str):
-                try:
-                    return codecs.decode(data, 'unicode_escape')
-                except Exception:
-                    return data
+        if isinstance(data, str):
+            return _decode_unicode_escape(data)
+        
+        # 循环内频繁使用的函数预先绑定为局部变量，省去每个元素上的全局/属性查找
+        _isinstance = isinstance
+        decode = _decode_unicode_escape
+        stack = deque((data,))
+        push, pop = stack.append, stack.pop
+        while stack:
+            container = pop()
+            if _isinstance(container, dict):
+                items = container.items()
+            elif _isinstance(container, list):
+                items = enumerate(container)
             else:
-                return data
-        except Exception as e:
-            logger.warning(f"Unicode解码失败: {str(e)}")
-            return data
+                continue
+            
+            for key, value in list(items):
+                # 字符串叶子最常见，优先判断
+                if _isinstance(value, str):
+                    container[key] = decode(value)
+                elif _isinstance(value, _CONTAINER_TYPES):
+                    push(value)
+        return data
     
     @staticmethod
     def filter_none_values(obj: Any) -> Any:
         """
         过滤None值
         
+        使用显式栈迭代遍历，原地删除字典和列表中的None值。
+        
         Args:
             obj: 要过滤的对象
             
         Returns:
             Any: 过滤后的对象
         """
-        try:
-            if isinstance(obj, dict):
-                return {k: FileService.filter_none_values(v) 
-                       for k, v in obj.items() if v is not None}
-            elif isinstance(obj, list):
-                return [FileService.filter_none_values(i) 
-                       for i in obj if i is not None]
+        # 循环内频繁使用的函数预先绑定为局部变量，省去每个元素上的全局/属性查找
+        _isinstance = isinstance
+        stack = deque((obj,))
+        push, pop = stack.append, stack.pop
+        while stack:
+            container = pop()
+            if _isinstance(container, dict):
+                for key in [k for k, v in container.items() if v is None]:
+                    del container[key]
+                children = container.values()
+            elif _isinstance(container, list):
+                if None in container:
+                    container[:] = [i for i in container if i is not None]
+                children = container
             else:
-                return obj
-        except Exception as e:
-            logger.warning(f"过滤None值失败: {str(e)}")
-            return obj
+                continue
+            
+            for value in children:
+                if _isinstance(value, _CONTAINER_TYPES):
+                    push(value)
+        return obj
     
     @staticmethod
-    def get_file_info(file: FileStorage) -> Dict[str, Any]:
+    def get_file_info(file: FileStorage, file_type: Optional[str] = None) -> Dict[str, Any]:
         """
         获取文件信息
         
+        开启 FILE_DIGEST_ENABLED 时附带内容摘要（digest 字段）
+        
         Args:
             file: 文件对象
+            file_type: 已推测的文件类型，为空时重新推测
             
         Returns:
             Dict[str, Any]: 文件信息
         """
         try:
-            # 保存当前文件指针位置
-            current_position = file.tell()
-            
-            # 获取文件大小
-            file.seek(0, 2)
-            file_size = file.tell()
-            
-            # 恢复文件指针到原始位置
-            file.seek(current_position)
-            
-            return {
+            file_info = {
                 'filename': file.filename,
-                'size': file_size,
+                'size': get_file_size(file),
                 'mimetype': getattr(file, 'mimetype', None),
-                'type': FileService.guess_file_type(file)
+                'type': file_type if file_type is not None else FileService.guess_file_type(file)
             }
+            if get_config().FILE_DIGEST_ENABLED:
+                file_info['digest'] = get_file_digest(file)
+            return file_info
         except Exception as e:
-            logger.error(f"获取文件信息失败: {str(e)}")
+            logger.error("获取文件信息失败: %s", e)
             # 确保在异常情况下也重置文件指针
             try:
                 file.seek(0)
@@ -247,4 +376,45 @@ class FileService:
                 'size': 0,
                 'mimetype': None,
                 'type': 'unknown'
-            }
\ No newline at end of file
+            }
+    
+    @staticmethod
+    def sniff_and_forward(file: FileStorage, dify_client, user_id: str,
+                          max_size: int) -> Tuple[str, Dict[str, Any]]:
+        """
+        单次遍历完成文件校验并转发到Dify
+        
+        只获取一次文件大小，校验通过后将原始流直接交给上传请求分块读取，
+        避免校验、取信息、上传各自重复定位和读取文件。
+        
+        Args:
+            file: 文件对象
+            dify_client: Dify客户端
+            user_id: 用户ID
+            max_size: 最大文件大小（字节）
+            
+        Returns:
+            Tuple[str, Dict[str, Any]]: (文件ID, 文件信息)
+            
+        Raises:
+            FileValidationError: 文件校验失败
+            FileUploadError: 文件上传失败
+        """
+        file_size = get_file_size(file) if file else None
+        
+        ValidationService.validate_file_or_raise(file, max_size, file_size)
+        
+        file_type = FileService.guess_file_type(file)
+        if not FileService.validate_file_type_support(file_type):
+            raise UnsupportedFileTypeError(f"不支持的文件类型: {file_type}")
+        
+        file_info = {
+            'filename': file.filename,
+            'size': file_size,
+            'mimetype': getattr(file, 'mimetype', None),
+            'type': file_type
+        }
+        logger.debug("文件信息: %s", file_info)
+        
+        file_id = dify_client.upload_file(file, user_id)
+        return file_id, file_info
@@ -2,7 +2,7 @@
 验证服务模块
 提供各种验证功能
 """
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Type
 from werkzeug.datastructures import FileStorage
 
 from config.constants import (
@@ -14,10 +14,22 @@ from utils.exceptions import (
     FileSizeExceededError, EmptyFileError,
     InvalidParameterError, MissingParameterError
 )
+from utils.file_utils import get_file_size
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 枚举取值集合与错误提示在模块加载时预先计算，校验时直接查表
+_REVIEW_TYPES = frozenset(e.value for e in ReviewTypeEnum)
+_CONTRACTING_PARTIES = frozenset(e.value for e in ContractingPartyEnum)
+_CATEGORIES = frozenset(e.value for e in CategoryEnum)
+# 扩展名统一转为小写的frozenset，不依赖常量的书写方式即可保证O(1)且大小写一致的匹配
+_ALLOWED_EXTENSIONS = frozenset(map(str.lower, ALLOWED_EXTENSIONS))
+_ALLOWED_FORMATS_STR = ', '.join(sorted(_ALLOWED_EXTENSIONS))
+_UNSUPPORTED_FILE_TYPE_MESSAGE = ERROR_MESSAGES['UNSUPPORTED_FILE_TYPE'].format(
+    formats=_ALLOWED_FORMATS_STR
+)
+
 
 class ValidationService:
     """验证服务类"""
@@ -33,60 +45,103 @@ class ValidationService:
         Returns:
             bool: 是否允许
         """
-        return ('.' in filename and 
-                filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS)
+        _, dot, ext = filename.rpartition('.')
+        return bool(dot) and ext.lower() in _ALLOWED_EXTENSIONS
+    
+    @staticmethod
+    def _validate_file_impl(file: FileStorage, max_size: int,
+                            file_size: Optional[int]) -> Optional[Tuple[Type[FileValidationError], str]]:
+        """
+        文件验证的内部实现
+        
+        校验失败时直接返回异常类型和错误消息而不抛出异常，
+        避免在对外接口处抛出后又立即捕获，白白构造异常对象和回溯信息。
+        
+        Args:
+            file: 上传的文件对象
+            max_size: 最大文件大小（字节）
+            file_size: 已测得的文件大小（字节），为空时自行获取
+            
+        Returns:
+            Optional[Tuple[Type[FileValidationError], str]]: 验证通过返回None，否则返回(异常类型, 错误消息)
+        """
+        # 检查文件是否存在
+        if not file:
+            return FileValidationError, ERROR_MESSAGES['NO_FILE_SELECTED']
+        
+        # 检查文件名
+        if file.filename == '':
+            return EmptyFileError, ERROR_MESSAGES['EMPTY_FILENAME']
+        
+        # 检查文件扩展名
+        if not ValidationService.validate_file_extension(file.filename):
+            return UnsupportedFileTypeError, _UNSUPPORTED_FILE_TYPE_MESSAGE
+        
+        # 检查文件大小
+        if file_size is None:
+            file_size = get_file_size(file)
+        
+        if file_size > max_size:
+            max_size_mb = max_size // (1024 * 1024)
+            return FileSizeExceededError, ERROR_MESSAGES['FILE_TOO_LARGE'].format(max_size=max_size_mb)
+        
+        if file_size == 0:
+            return EmptyFileError, ERROR_MESSAGES['EMPTY_FILE']
+        
+        logger.info("文件验证通过: %s, 大小: %s bytes", file.filename, file_size)
+        return None
     
     @staticmethod
-    def validate_file(file: FileStorage, max_size: int) -> Tuple[bool, Optional[str]]:
+    def validate_file(file: FileStorage, max_size: int,
+                      file_size: Optional[int] = None) -> Tuple[bool, Optional[str]]:
         """
         全面的文件验证
         
         Args:
             file: 上传的文件对象
             max_size: 最大文件大小（字节）
+            file_size: 已测得的文件大小（字节），为空时自行获取
             
         Returns:
             Tuple[bool, Optional[str]]: (是否有效, 错误消息)
         """
         try:
-            # 检查文件是否存在
-            if not file:
-                raise FileValidationError(ERROR_MESSAGES['NO_FILE_SELECTED'])
-            
-            # 检查文件名
-            if file.filename == '':
-                raise EmptyFileError(ERROR_MESSAGES['EMPTY_FILENAME'])
-            
-            # 检查文件扩展名
-            if not ValidationService.validate_file_extension(file.filename):
-                formats = ', '.join(sorted(ALLOWED_EXTENSIONS))
-                raise UnsupportedFileTypeError(
-                    ERROR_MESSAGES['UNSUPPORTED_FILE_TYPE'].format(formats=formats)
-                )
-            
-            # 检查文件大小
-            file.seek(0, 2)  # 移动到文件末尾
-            file_size = file.tell()
-            file.seek(0)  # 重置到文件开头
-            
-            if file_size > max_size:
-                max_size_mb = max_size // (1024 * 1024)
-                raise FileSizeExceededError(
-                    ERROR_MESSAGES['FILE_TOO_LARGE'].format(max_size=max_size_mb)
-                )
-            
-            if file_size == 0:
-                raise EmptyFileError(ERROR_MESSAGES['EMPTY_FILE'])
-            
-            logger.info(f"文件验证通过: {file.filename}, 大小: {file_size} bytes")
+            error = ValidationService._validate_file_impl(file, max_size, file_size)
+        except (OSError, ValueError) as e:
+            # 只有读取文件大小时可能失败
+            logger.error("文件验证过程中发生未知错误: %s", e)
+            return False, "文件验证失败"
+        
+        if error is None:
             return True, None
+        
+        logger.warning("文件验证失败: %s", error[1])
+        return False, error[1]
+    
+    @staticmethod
+    def validate_file_or_raise(file: FileStorage, max_size: int,
+                               file_size: Optional[int] = None) -> None:
+        """
+        全面的文件验证，失败时抛出异常
+        
+        Args:
+            file: 上传的文件对象
+            max_size: 最大文件大小（字节）
+            file_size: 已测得的文件大小（字节），为空时自行获取
             
-        except FileValidationError as e:
-            logger.warning(f"文件验证失败: {str(e)}")
-            return False, str(e)
-        except Exception as e:
-            logger.error(f"文件验证过程中发生未知错误: {str(e)}")
-            return False, "文件验证失败"
+        Raises:
+            FileValidationError: 文件验证失败（按失败原因抛出对应子类）
+        """
+        try:
+            error = ValidationService._validate_file_impl(file, max_size, file_size)
+        except (OSError, ValueError) as e:
+            logger.error("文件验证过程中发生未知错误: %s", e)
+            raise FileValidationError("文件验证失败")
+        
+        if error is not None:
+            error_class, message = error
+            logger.warning("文件验证失败: %s", message)
+            raise error_class(message)
     
     @staticmethod
     def validate_review_type(review_type: str) -> bool:
@@ -99,10 +154,7 @@ class ValidationService:
         Returns:
             bool: 是否有效
         """
-        try:
-            return review_type in [e.value for e in ReviewTypeEnum]
-        except Exception:
-            return False
+        return review_type in _REVIEW_TYPES
     
     @staticmethod
     def validate_contracting_party(contracting_party: str) -> bool:
@@ -115,10 +167,7 @@ class ValidationService:
         Returns:
             bool: 是否有效
         """
-        try:
-            return contracting_party in [e.value for e in ContractingPartyEnum]
-        except Exception:
-            return False
+        return contracting_party in _CONTRACTING_PARTIES
     
     @staticmethod
     def validate_category(category: str) -> bool:
@@ -131,10 +180,7 @@ class ValidationService:
         Returns:
             bool: 是否有效
         """
-        try:
-            return category in [e.value for e in CategoryEnum]
-        except Exception:
-            return False
+        return category in _CATEGORIES
     
     @staticmethod
     def validate_upload_request(review_type: str, contracting_party: str = None) -> None:
@@ -164,7 +210,7 @@ class ValidationService:
             if not ValidationService.validate_contracting_party(contracting_party):
                 raise InvalidParameterError(ERROR_MESSAGES['INVALID_CONTRACTING_PARTY'])
         
-        logger.info(f"请求参数验证通过: review_type={review_type}, contracting_party={contracting_party}")
+        logger.info("请求参数验证通过: review_type=%s, contracting_party=%s", review_type, contracting_party)
     
     @staticmethod
     def get_category_from_review_type(review_type: str) -> str:
@@ -202,4 +248,4 @@ class ValidationService:
         if not user_id:
             raise MissingParameterError("user_id参数缺失")
         
-        logger.info(f"流式聊天请求验证通过: user_id={user_id}")
\ No newline at end of file
+        logger.info("流式聊天请求验证通过: user_id=%s", user_id)
\ No newline at end of file
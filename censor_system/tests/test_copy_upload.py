@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+上传文件复制测试：内存中的小文件不落盘，已落盘文件走 os.sendfile
+"""
+import io
+import os
+import tempfile
+from tempfile import SpooledTemporaryFile
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from services import file_service
+
+SPOOL_MAX_SIZE = 500 * 1024
+
+
+def _spooled(data):
+    stream = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    stream.write(data)
+    stream.seek(0)
+    return stream
+
+
+def _copy(stream):
+    with tempfile.TemporaryFile() as dst:
+        file_service._copy_upload(FileStorage(stream, filename='upload.docx'), dst)
+        dst.seek(0)
+        return dst.read()
+
+
+@pytest.fixture
+def sendfile_calls(monkeypatch):
+    if not hasattr(os, 'sendfile'):
+        pytest.skip('当前平台不支持 os.sendfile')
+    calls = []
+    real_sendfile = os.sendfile
+
+    def spy(*args):
+        calls.append(args)
+        return real_sendfile(*args)
+
+    monkeypatch.setattr(file_service.os, 'sendfile', spy)
+    return calls
+
+
+def test_small_spooled_upload_stays_in_memory(sendfile_calls):
+    data = b'x' * 1024
+    stream = _spooled(data)
+
+    assert _copy(stream) == data
+    assert not stream._rolled
+    assert sendfile_calls == []
+
+
+def test_rolled_spooled_upload_uses_sendfile(sendfile_calls):
+    data = os.urandom(SPOOL_MAX_SIZE * 2)
+    stream = _spooled(data)
+    assert stream._rolled
+
+    assert _copy(stream) == data
+    assert sendfile_calls
+
+
+def test_in_memory_stream_falls_back_to_buffered_copy(sendfile_calls):
+    data = '合同内容'.encode('utf-8')
+
+    assert _copy(io.BytesIO(data)) == data
+    assert sendfile_calls == []
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Word文档生成进程池测试：子进程崩溃或任务超时后进程池能够恢复
+"""
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from flask import Flask
+
+import routes.main as main
+
+
+def _crash(result_type, result_data):
+    """模拟子进程崩溃（如OOM或lxml段错误）"""
+    os._exit(1)
+
+
+def _slow(result_type, result_data):
+    """模拟长时间无法完成的文档生成"""
+    time.sleep(5)
+    return b'slow'
+
+
+def _ok(result_type, result_data):
+    return b'docx'
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pool(monkeypatch):
+    monkeypatch.setattr(main, 'DOCX_BUILD_TIMEOUT', 0.5)
+    yield
+    pool = main._doc_pool
+    if pool is not None:
+        main._discard_doc_pool(pool)
+
+
+def test_broken_pool_is_rebuilt(monkeypatch):
+    monkeypatch.setattr(main, '_build_docx_bytes', _crash)
+    with pytest.raises(BrokenProcessPool):
+        main._build_docx_in_pool('text', 'x')
+
+    monkeypatch.setattr(main, '_build_docx_bytes', _ok)
+    assert main._build_docx_in_pool('text', 'x') == b'docx'
+
+
+def test_timeout_frees_worker_slots(monkeypatch):
+    monkeypatch.setattr(main, '_build_docx_bytes', _slow)
+    for _ in range(main.DOCX_POOL_WORKERS):
+        with pytest.raises(main.FutureTimeoutError):
+            main._build_docx_in_pool('text', 'x')
+
+    # 超时任务仍在旧进程池中运行，新请求在重建的进程池中立即完成
+    monkeypatch.setattr(main, '_build_docx_bytes', _ok)
+    started = time.monotonic()
+    assert main._build_docx_in_pool('text', 'x') == b'docx'
+    assert time.monotonic() - started < 2
+
+
+def test_download_word_timeout_returns_504(monkeypatch):
+    monkeypatch.setattr(main, '_build_docx_bytes', _slow)
+    app = Flask(__name__)
+    app.register_blueprint(main.main_bp)
+
+    response = app.test_client().post('/download_word', json={'result_type': 'text', 'result_data': 'x'})
+
+    assert response.status_code == 504
@@ -1,9 +1,11 @@
 """
 工具模块
-包含日志、异常处理等工具函数
+包含日志、异常处理、响应构造等工具函数
 """
 
 from .logger import get_logger
+from .response import ojson
+from .file_utils import get_file_size, get_file_digest
 from .exceptions import *
 
-__all__ = ['get_logger']
\ No newline at end of file
+__all__ = ['get_logger', 'ojson', 'get_file_size', 'get_file_digest']
\ No newline at end of file
@@ -0,0 +1,69 @@
+"""
+文件工具模块
+提供与上传文件流相关的工具函数
+"""
+import hashlib
+import os
+from tempfile import SpooledTemporaryFile
+
+from werkzeug.datastructures import FileStorage
+
+# 不支持 hashlib.file_digest 的Python版本按块读取时使用的块大小
+_DIGEST_CHUNK_SIZE = 1 << 20
+
+
+def get_file_size(file: FileStorage) -> int:
+    """
+    获取上传文件大小
+    
+    Werkzeug 会把较大的上传内容写入临时文件，此时直接对文件描述符 fstat 取大小，
+    不移动文件指针；内存中的 BytesIO 等流才回退到 seek/tell，并恢复原指针位置。
+    
+    Args:
+        file: 文件对象
+        
+    Returns:
+        int: 文件大小（字节）
+    """
+    stream = file.stream
+    # SpooledTemporaryFile.fileno() 会强制把内存数据落盘，需跳过
+    if not isinstance(stream, SpooledTemporaryFile):
+        try:
+            return os.fstat(stream.fileno()).st_size
+        except (AttributeError, OSError, ValueError):
+            pass
+    
+    current_position = stream.tell()
+    stream.seek(0, 2)
+    file_size = stream.tell()
+    stream.seek(current_position)
+    return file_size
+
+
+def get_file_digest(file: FileStorage, algorithm: str = 'blake2b') -> str:
+    """
+    计算上传文件内容的摘要
+    
+    Python 3.11+ 使用 hashlib.file_digest 在C层以大缓冲区读取并计算，
+    旧版本回退为按块读取；计算完成后恢复原指针位置。
+    
+    Args:
+        file: 文件对象
+        algorithm: 摘要算法名称
+        
+    Returns:
+        str: 十六进制摘要
+    """
+    stream = file.stream
+    current_position = stream.tell()
+    stream.seek(0)
+    try:
+        if hasattr(hashlib, 'file_digest'):
+            digest = hashlib.file_digest(stream, algorithm)
+        else:
+            digest = hashlib.new(algorithm)
+            for chunk in iter(lambda: stream.read(_DIGEST_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    finally:
+        stream.seek(current_position)
+    return digest.hexdigest()
@@ -7,7 +7,7 @@ import logging              # Python标准日志库
 import logging.handlers     # 日志处理器扩展模块，提供轮转文件处理器等高级功能
 import os                   # 操作系统接口，用于文件和目录操作
 import sys                  # 系统特定参数和函数，用于访问标准输出等
-from datetime import datetime  # 日期时间处理，用于记录函数执行时间
+from time import perf_counter_ns  # 单调高精度计时器，用于记录函数执行耗时
 from typing import Optional    # 类型提示，表示可选参数
 
 
@@ -29,9 +29,15 @@ class ColoredFormatter(logging.Formatter):
         'RESET': '\033[0m'      # 重置颜色到默认，避免颜色污染后续输出
     }
     
-    def format(self, record):
+    # 带颜色的级别名称，在类定义之后预先拼接好，格式化时直接查表
+    COLORED_LEVELNAMES = {}
+    
+    def formatMessage(self, record):
         """
-        重写format方法，为日志级别添加颜色
+        重写formatMessage方法，为日志级别添加颜色
+        
+        只在拼接消息期间临时替换levelname，结束后立即恢复，
+        避免其他处理器再格式化同一条记录时看到带颜色代码的级别名称
         
         Args:
             record: 日志记录对象，包含日志的所有信息
@@ -39,15 +45,23 @@ class ColoredFormatter(logging.Formatter):
         Returns:
             str: 格式化后的带颜色的日志字符串
         """
-        # 检查记录对象是否有levelname属性（日志级别名称）
-        if hasattr(record, 'levelname'):
-            # 获取对应级别的颜色代码，如果没有找到则使用重置色
-            color = self.COLORS.get(record.levelname, self.COLORS['RESET'])
-            # 为日志级别名称添加颜色包装：颜色代码 + 级别名 + 重置代码
-            record.levelname = f"{color}{record.levelname}{self.COLORS['RESET']}"
+        levelname = record.levelname
+        colored = self.COLORED_LEVELNAMES.get(levelname)
+        if colored is None:
+            return super().formatMessage(record)
         
-        # 调用父类的format方法完成最终的格式化
-        return super().format(record)
+        record.levelname = colored
+        try:
+            # 调用父类的formatMessage方法完成最终的格式化
+            return super().formatMessage(record)
+        finally:
+            record.levelname = levelname
+
+
+ColoredFormatter.COLORED_LEVELNAMES = {
+    level: f"{color}{level}{ColoredFormatter.COLORS['RESET']}"
+    for level, color in ColoredFormatter.COLORS.items() if level != 'RESET'
+}
 
 
 class LoggerManager:
@@ -114,9 +128,10 @@ class LoggerManager:
             datefmt='%Y-%m-%d %H:%M:%S'  # 完整的日期时间格式
         )
         
-        # 控制台格式：使用彩色格式化器，信息相对简洁
-        # 适合实时查看，不需要过多细节
-        console_formatter = ColoredFormatter(
+        # 控制台格式：终端下使用彩色格式化器，信息相对简洁
+        # 适合实时查看，不需要过多细节；输出被重定向到文件或管道时不加颜色代码
+        console_formatter_class = ColoredFormatter if sys.stdout.isatty() else logging.Formatter
+        console_formatter = console_formatter_class(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             datefmt='%H:%M:%S'  # 控制台只显示时分秒，节省空间
         )
@@ -145,13 +160,14 @@ class LoggerManager:
         Returns:
             logging.Logger: 日志记录器实例
         """
-        # 如果该名称的日志记录器不存在，则创建并缓存
-        if name not in cls._loggers:
-            logger = logging.getLogger(name)  # 创建新的日志记录器
-            cls._loggers[name] = logger       # 缓存到类变量中
+        # 命中缓存时只需一次字典查找
+        logger = cls._loggers.get(name)
+        if logger is None:
+            # 创建新的日志记录器并缓存到类变量中（setdefault保证并发创建时只保留一个）
+            logger = cls._loggers.setdefault(name, logging.getLogger(name))
         
         # 返回缓存的日志记录器实例
-        return cls._loggers[name]
+        return logger
 
 
 def get_logger(name: Optional[str] = None) -> logging.Logger:
@@ -174,12 +190,10 @@ def get_logger(name: Optional[str] = None) -> logging.Logger:
         logger = get_logger()
     """
     if name is None:
-        # 使用Python的inspect模块获取调用者信息
-        # 这样可以自动推断出调用get_logger的模块名
-        import inspect
-        frame = inspect.currentframe().f_back  # 获取调用者的栈帧
+        # 直接取调用者的栈帧，自动推断出调用get_logger的模块名
+        # sys._getframe 无需导入inspect，开销远小于inspect.currentframe
         # 从调用者的全局变量中获取模块名（__name__变量）
-        name = frame.f_globals.get('__name__', 'unknown')
+        name = sys._getframe(1).f_globals.get('__name__', 'unknown')
     
     # 委托给LoggerManager来实际创建和管理日志记录器
     return LoggerManager.get_logger(name)
@@ -219,23 +233,22 @@ def log_function_call(func):
         
         # 记录函数调用信息（DEBUG级别）
         # 包含函数名和传入的参数，便于调试和问题追踪
-        logger.debug(f"调用函数 {func.__name__} - 参数: args={args}, kwargs={kwargs}")
+        # 仅在DEBUG启用时才格式化参数，避免生产环境对参数做repr
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("调用函数 %s - 参数: args=%r, kwargs=%r", func.__name__, args, kwargs)
         
         try:
-            # 记录函数开始执行的时间
-            start_time = datetime.now()
+            # 记录函数开始执行的时间（纳秒）
+            start_ns = perf_counter_ns()
             
             # 执行原函数，保持所有原有的功能和行为
             result = func(*args, **kwargs)
             
-            # 记录函数执行结束的时间
-            end_time = datetime.now()
-            
-            # 计算函数执行耗时（秒）
-            duration = (end_time - start_time).total_seconds()
+            # 计算函数执行耗时（毫秒）
+            duration_ms = (perf_counter_ns() - start_ns) / 1e6
             
             # 记录函数执行成功的信息，包含耗时统计
-            logger.debug(f"函数 {func.__name__} 执行完成 - 耗时: {duration:.3f}秒")
+            logger.debug("函数 %s 执行完成 - 耗时: %.3f ms", func.__name__, duration_ms)
             
             # 返回原函数的执行结果
             return result
@@ -243,7 +256,7 @@ def log_function_call(func):
         except Exception as e:
             # 捕获函数执行过程中的任何异常
             # 记录详细的错误信息，包含完整的异常堆栈
-            logger.error(f"函数 {func.__name__} 执行失败 - 错误: {str(e)}", exc_info=True)
+            logger.error("函数 %s 执行失败 - 错误: %s", func.__name__, e, exc_info=True)
             
             # 重新抛出异常，不改变原有的异常处理流程
             # 这样调用者仍然可以正常处理异常
@@ -0,0 +1,30 @@
+"""
+响应工具模块
+提供基于orjson的JSON响应构造函数
+"""
+from typing import Any
+
+import orjson
+from flask import Response
+
+_JSON_MIMETYPE = 'application/json'
+
+
+def ojson(payload: Any, status: int = 200) -> Response:
+    """
+    构造JSON响应
+    
+    使用orjson序列化，中文直接以UTF-8输出，不做逐字符转义。
+    
+    Args:
+        payload: 要序列化的数据
+        status: HTTP状态码
+        
+    Returns:
+        Response: JSON响应对象
+    """
+    return Response(
+        orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS),
+        status=status,
+        mimetype=_JSON_MIMETYPE
+    )
@@ -2,31 +2,84 @@
 统一门户应用主入口
 集成四个子系统的Web门户
 """
-from flask import Flask, render_template, request, redirect, url_for, jsonify, send_from_directory
+from flask import Flask, Response, render_template, request, redirect, url_for, send_file, stream_with_context
 import requests
 import os
+import io
+import atexit
+import threading
+import time
+import orjson
 from urllib.parse import urljoin, urlparse
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 
 from config.settings import Config
 from services.proxy_service import ProxyService
 from services.health_check import HealthCheckService
 from services.service_manager import service_manager
 from utils.logger import setup_logger
+from utils.response import ojson, OrjsonProvider
 from blueprints.writing import writing_bp
 from blueprints.case2pg import case2pg_bp
 from blueprints.censor import censor_bp
 from blueprints.qa_sys import qa_sys_bp
 from blueprints.meeting_minutes import meeting_minutes_bp
 
+# 响应压缩为可选依赖，未安装时按原样返回
+try:
+    from flask_compress import Compress
+    COMPRESS_AVAILABLE = True
+except ImportError:
+    COMPRESS_AVAILABLE = False
+
+# 静态文件WSGI中间件为可选依赖，未安装时由Flask路由兜底
+try:
+    from whitenoise import WhiteNoise
+    WHITENOISE_AVAILABLE = True
+except ImportError:
+    WHITENOISE_AVAILABLE = False
+
 # 设置日志
 logger = setup_logger(__name__)
 
+# 子系统配置启动后不再变化，系统列表在导入时序列化一次
+_SYSTEMS_JSON = orjson.dumps({
+    name: {
+        'name': config['name'],
+        'description': config['description'],
+        'icon': config['icon'],
+        'color': config['color'],
+        'url': config['path']
+    }
+    for name, config in Config.SUBSYSTEMS.items()
+})
+
+# 网站图标缓存时间（秒），图标内容基本不变，缓存一年
+FAVICON_MAX_AGE = 31536000
+
+# 可通过 /api/<name>/launch 启动的内置子系统：名称 -> (显示名称, 访问地址, 附加返回字段)
+LAUNCH_SPECS = {
+    'writing': ('智能文件撰写系统', 'http://localhost:9000/writing', {}),
+    'case2pg': ('数据处理系统', 'http://localhost:9000/case2pg', {}),
+    'censor': ('文件审查系统', 'http://localhost:9000/censor',
+               {'iframe_url': 'http://localhost:9000/censor'}),
+}
+
 def create_app():
     """应用工厂函数"""
     app = Flask(__name__)
     app.config.from_object(Config)
+    # jsonify（含子系统蓝图的 success_response/error_response）统一走orjson
+    app.json = OrjsonProvider(app)
+    
+    # 按 Accept-Encoding 协商 br/gzip 压缩JSON等文本响应，并输出 Vary: Accept-Encoding
+    if COMPRESS_AVAILABLE:
+        Compress(app)
+    else:
+        logger.warning("未安装 Flask-Compress，响应压缩未启用")
     
     # 初始化服务
     proxy_service = ProxyService()
@@ -34,7 +87,20 @@ def create_app():
     app.template_folder = Config.TEMPLATE_FOLDER
     app.static_folder = Config.STATIC_FOLDER
 
-    health_service = HealthCheckService()
+    # 健康检查、服务状态查询共用一个常驻线程池，避免每个请求重复创建线程
+    fanout_pool = ThreadPoolExecutor(
+        max_workers=Config.FANOUT_POOL_WORKERS,
+        thread_name_prefix='portal-fanout'
+    )
+    app.extensions['fanout_pool'] = fanout_pool
+    atexit.register(fanout_pool.shutdown, wait=False)
+
+    # 后台轮询线程由入口（wsgi.py / __main__）启动，create_app 本身不产生常驻线程
+    health_service = HealthCheckService(executor=fanout_pool)
+    app.extensions['health_service'] = health_service
+    
+    # /health/stream 订阅者名额：长连接各占一个服务线程，限制数量避免占满线程池
+    stream_slots = threading.BoundedSemaphore(Config.HEALTH_STREAM_MAX_SUBSCRIBERS)
 
     # 注册蓝图：智能文件撰写系统在统一门户下以 /writing 前缀提供
     app.register_blueprint(writing_bp, url_prefix='/writing')
@@ -65,289 +131,260 @@ def create_app():
     def health_check():
         """健康检查接口"""
         try:
-            status = health_service.check_all_services()
-            return jsonify(status)
+            # 优先返回后台轮询的最新快照，首次检查完成前退回到短时缓存
+            status = health_service.get_snapshot() or health_service.get_cached_all_services()
+            return ojson(status)
         except Exception as e:
             logger.error(f"健康检查失败: {str(e)}")
-            return jsonify({"error": "健康检查失败"}), 500
+            return ojson({"error": "健康检查失败"}, 500)
+    
+    @app.route('/health/stream')
+    def health_stream():
+        """
+        健康状态推送接口（SSE），后台快照更新时推送，空闲时发送心跳
+        
+        每个连接最长保持 HEALTH_STREAM_MAX_AGE 秒，到期后服务端关闭、客户端自动重连；
+        同时在线数超过 HEALTH_STREAM_MAX_SUBSCRIBERS 时返回503，客户端应退回轮询 /health
+        """
+        if not stream_slots.acquire(blocking=False):
+            response = ojson({"error": "健康状态推送连接数已满，请改用 /health 轮询"}, 503)
+            response.headers['Retry-After'] = str(Config.HEALTH_STREAM_KEEPALIVE)
+            return response
+        # 按需启动后台轮询（已启动时为空操作）
+        health_service.start_background(Config.HEALTH_POLL_INTERVAL)
+        
+        def event_stream():
+            deadline = time.monotonic() + Config.HEALTH_STREAM_MAX_AGE
+            version = 0
+            # 告知客户端连接关闭后的重连间隔（毫秒）
+            yield b'retry: 3000\n\n'
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                new_version, snapshot = health_service.wait_for_snapshot(
+                    version, timeout=min(Config.HEALTH_STREAM_KEEPALIVE, remaining))
+                if new_version != version and snapshot is not None:
+                    version = new_version
+                    yield b'data: ' + orjson.dumps(snapshot) + b'\n\n'
+                else:
+                    yield b': keepalive\n\n'
+        
+        response = Response(
+            stream_with_context(event_stream()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+        # 连接结束（正常到期或客户端断开）时归还名额
+        response.call_on_close(stream_slots.release)
+        return response
     
     @app.route('/health/<service_name>')
     def health_check_service(service_name):
         """单个服务健康检查"""
         try:
-            status = health_service.check_service(service_name)
-            return jsonify(status)
+            status = health_service.get_cached_service_status(service_name)
+            return ojson(status)
         except Exception as e:
             logger.error(f"服务 {service_name} 健康检查失败: {e}")
-            return jsonify({'error': f'服务 {service_name} 健康检查失败'}), 500
+            return ojson({'error': f'服务 {service_name} 健康检查失败'}, 500)
     
     @app.route('/api/systems')
     def get_systems():
         """获取系统列表"""
-        try:
-            systems = {}
-            for name, config in Config.SUBSYSTEMS.items():
-                systems[name] = {
-                    'name': config['name'],
-                    'description': config['description'],
-                    'icon': config['icon'],
-                    'color': config['color'],
-                    'url': config['path']
-                }
-            return jsonify(systems)
-        except Exception as e:
-            logger.error(f"获取系统列表失败: {e}")
-            return jsonify({'error': '获取系统列表失败'}), 500
+        return Response(_SYSTEMS_JSON, mimetype='application/json')
     
     # 服务管理API端点
     @app.route('/api/services/status')
     def get_all_services_status():
         """获取所有服务状态"""
         try:
-            status = service_manager.get_all_services_status()
-            return jsonify({
+            status = service_manager.get_all_services_status(executor=fanout_pool)
+            return ojson({
                 'success': True,
                 'services': status
             })
         except Exception as e:
             logger.error(f"获取服务状态失败: {e}")
-            return jsonify({
+            return ojson({
                 'success': False,
                 'message': f'获取服务状态失败: {str(e)}'
-            }), 500
+            }, 500)
     
     @app.route('/api/services/<service_name>/status')
     def get_service_status(service_name):
         """获取单个服务状态"""
         try:
             if service_name not in service_manager.services:
-                return jsonify({
+                return ojson({
                     'success': False,
                     'message': f'未知服务: {service_name}'
-                }), 404
+                }, 404)
             
             status = service_manager.get_service_status(service_name)
-            return jsonify({
+            return ojson({
                 'success': True,
                 'status': status
             })
         except Exception as e:
             logger.error(f"获取服务 {service_name} 状态失败: {e}")
-            return jsonify({
+            return ojson({
                 'success': False,
                 'message': f'获取服务状态失败: {str(e)}'
-            }), 500
+            }, 500)
     
     @app.route('/api/services/<service_name>/start', methods=['POST'])
     def start_service(service_name):
         """启动服务"""
         try:
             if service_name not in service_manager.services:
-                return jsonify({
+                return ojson({
                     'success': False,
                     'message': f'未知服务: {service_name}'
-                }), 404
+                }, 404)
             
             success = service_manager.start_service(service_name)
             if success:
-                return jsonify({
+                return ojson({
                     'success': True,
                     'message': f'服务 {service_name} 启动成功'
                 })
             else:
-                return jsonify({
+                return ojson({
                     'success': False,
                     'message': f'服务 {service_name} 启动失败'
-                }), 500
+                }, 500)
         except Exception as e:
             logger.error(f"启动服务 {service_name} 失败: {e}")
-            return jsonify({
+            return ojson({
                 'success': False,
                 'message': f'启动服务失败: {str(e)}'
-            }), 500
+            }, 500)
     
     @app.route('/api/services/<service_name>/stop', methods=['POST'])
     def stop_service(service_name):
         """停止服务"""
         try:
             if service_name not in service_manager.services:
-                return jsonify({
+                return ojson({
                     'success': False,
                     'message': f'未知服务: {service_name}'
-                }), 404
+                }, 404)
             
             success = service_manager.stop_service(service_name)
             if success:
-                return jsonify({
+                return ojson({
                     'success': True,
                     'message': f'服务 {service_name} 停止成功'
                 })
             else:
-                return jsonify({
+                return ojson({
                     'success': False,
                     'message': f'服务 {service_name} 停止失败'
-                }), 500
+                }, 500)
         except Exception as e:
             logger.error(f"停止服务 {service_name} 失败: {e}")
-            return jsonify({
+            return ojson({
                 'success': False,
                 'message': f'停止服务失败: {str(e)}'
-            }), 500
+            }, 500)
     
     @app.route('/api/services/<service_name>/reset-stats', methods=['POST'])
     def reset_service_stats(service_name):
         """重置服务统计信息"""
         try:
             if service_name not in service_manager.services:
-                return jsonify({
+                return ojson({
                     'success': False,
                     'message': f'未知服务: {service_name}'
-                }), 404
+                }, 404)
             
             service_manager.reset_service_stats(service_name)
-            return jsonify({
+            return ojson({
                 'success': True,
                 'message': f'服务 {service_name} 统计信息已重置'
             })
         except Exception as e:
             logger.error(f"重置服务 {service_name} 统计信息失败: {e}")
-            return jsonify({
+            return ojson({
                 'success': False,
                 'message': f'重置统计信息失败: {str(e)}'
-            }), 500
+            }, 500)
     
-    @app.route('/api/writing/launch', methods=['POST'])
-    def launch_writing_system():
-        """启动智能文件撰写系统并返回状态"""
+    def _launch(service_name, display_name, service_url, **extra):
+        """启动内置子系统，等待其就绪后返回状态"""
         try:
-            # 启动writing服务
-            success = service_manager.start_service('writing')
-            
-            if success:
-                # 等待服务启动完成
-                import time
-                time.sleep(2)  # 给服务一些启动时间
-                
-                # 检查服务是否真正启动成功
-                status = service_manager.get_service_status('writing')
-                if status.get('status') == 'running':
-                    return jsonify({
-                        'success': True,
-                        'message': '智能文件撰写系统启动成功',
-                        'service_url': 'http://localhost:9000/writing'
-                    })
-                else:
-                    return jsonify({
-                        'success': False,
-                        'message': '服务启动失败，请检查系统状态'
-                    }), 500
-            else:
-                return jsonify({
-                    'success': False,
-                    'message': '无法启动智能文件撰写系统'
-                }), 500
-                
-        except Exception as e:
-            logger.error(f"启动智能文件撰写系统失败: {e}")
-            return jsonify({
-                'success': False,
-                'message': f'启动失败: {str(e)}'
-            }), 500
-    @app.route('/api/case2pg/launch', methods=['POST'])
-    def launch_case2pg_system():
-        """启动数据处理系统并返回状态"""
-        try:
-            # 启动case2pg服务
-            success = service_manager.start_service('case2pg')
-            
-            if success:
-                # 等待服务启动完成
-                import time
-                time.sleep(2)  # 给服务一些启动时间
-                
-                # 检查服务是否真正启动成功
-                status = service_manager.get_service_status('case2pg')
-                if status.get('status') == 'running':
-                    return jsonify({
-                        'success': True,
-                        'message': '数据处理系统启动成功',
-                        'service_url': 'http://localhost:9000/case2pg'
-                    })
-                else:
-                    return jsonify({
-                        'success': False,
-                        'message': '服务启动失败，请检查系统状态'
-                    }), 500
-            else:
-                return jsonify({
-                    'success': False,
-                    'message': '无法启动数据处理系统'
-                }), 500
-                
-        except Exception as e:
-            logger.error(f"启动数据处理系统失败: {e}")
-            return jsonify({
-                'success': False,
-                'message': f'启动失败: {str(e)}'
-            }), 500
-        
-
-
-    @app.route('/api/censor/launch', methods=['POST'])
-    def launch_censor_system():
-        """启动文件审查系统并返回状态"""
-        try:
-            # 启动censor服务
-            success = service_manager.start_service('censor')
+            success = service_manager.start_service(service_name)
             
             if success:
-                # 等待服务启动完成
-                import time
-                time.sleep(2)  # 给服务一些启动时间
-                
-                # 检查服务是否真正启动成功
-                status = service_manager.get_service_status('censor')
-                if status.get('status') == 'running':
-                    return jsonify({
+                # 就绪即返回，不再固定等待；最长等待 SERVICE_READY_TIMEOUT 秒
+                running, status = service_manager.wait_for_running(
+                    service_name, timeout=Config.SERVICE_READY_TIMEOUT)
+                if running:
+                    return ojson({
                         'success': True,
-                        'message': '文件审查系统启动成功',
-                        'service_url': 'http://localhost:9000/censor',
-                        'iframe_url': 'http://localhost:9000/censor'
+                        'message': f'{display_name}启动成功',
+                        'service_url': service_url,
+                        **extra
                     })
                 else:
-                    return jsonify({
+                    return ojson({
                         'success': False,
                         'message': '服务启动失败，请检查系统状态'
-                    }), 500
+                    }, 500)
             else:
-                return jsonify({
+                return ojson({
                     'success': False,
-                    'message': '无法启动文件审查系统'
-                }), 500
+                    'message': f'无法启动{display_name}'
+                }, 500)
                 
         except Exception as e:
-            logger.error(f"启动文件审查系统失败: {e}")
-            return jsonify({
+            logger.error(f"启动{display_name}失败: {e}")
+            return ojson({
                 'success': False,
                 'message': f'启动失败: {str(e)}'
-            }), 500
-
-
+            }, 500)
     
-    @app.route('/favicon.ico')
-    def favicon():
-        """网站图标"""
-        return send_from_directory(os.path.join(app.root_path, 'static'),
-                                   'favicon.ico', mimetype='image/vnd.microsoft.icon')
+    # 按 LAUNCH_SPECS 统一注册启动接口，端点名与原视图函数保持一致
+    for name, (display_name, service_url, extra) in LAUNCH_SPECS.items():
+        app.add_url_rule(
+            f'/api/{name}/launch',
+            endpoint=f'launch_{name}_system',
+            view_func=partial(_launch, name, display_name, service_url, **extra),
+            methods=['POST']
+        )
+    
+    # static/root 下只放需要在站点根路径提供的文件（目前只有 favicon.ico）
+    root_files_dir = os.path.join(app.root_path, 'static', 'root')
+    if WHITENOISE_AVAILABLE:
+        # /favicon.ico 由 WhiteNoise 在WSGI层直接返回，不占用Flask路由，标记为 immutable 长期缓存
+        app.wsgi_app = WhiteNoise(
+            app.wsgi_app,
+            root=root_files_dir,
+            immutable_file_test=lambda path, url: url == '/favicon.ico'
+        )
+    else:
+        # 网站图标启动时读入内存，之后不再访问磁盘
+        with open(os.path.join(root_files_dir, 'favicon.ico'), 'rb') as f:
+            favicon_bytes = f.read()
+        
+        @app.route('/favicon.ico')
+        def favicon():
+            """网站图标"""
+            response = send_file(io.BytesIO(favicon_bytes), mimetype='image/vnd.microsoft.icon',
+                                 max_age=FAVICON_MAX_AGE)
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+            return response
     
     @app.route('/api/monitoring/status')
     def monitoring_status():
         try:
             status = service_manager.get_monitoring_status()
-            return jsonify(status)
+            return ojson(status)
         except Exception as e:
             logger.error(f"获取监控状态失败: {e}")
-            return jsonify({'error': '获取监控状态失败'}), 500
+            return ojson({'error': '获取监控状态失败'}, 500)
     
     @app.errorhandler(404)
     def not_found(error):
@@ -384,6 +421,7 @@ def create_app():
 
 if __name__ == '__main__':
     app = create_app()
+    app.extensions['health_service'].start_background(Config.HEALTH_POLL_INTERVAL)
     
     logger.info("启动统一门户应用...")
     logger.info(f"门户地址: http://{Config.HOST}:{Config.PORT}")
@@ -402,6 +440,9 @@ if __name__ == '__main__':
     print(f"📊 集成子系统: 文件撰写、业务查询、数据处理、文件审查、会议纪要")
     print(f"{'='*60}\n")
     
+    # 开发服务器仅用于本地调试，生产环境请使用 gunicorn/waitress 加载 wsgi:app
+    logger.warning("当前使用 Flask 开发服务器，生产环境请使用: gunicorn -c gunicorn.conf.py wsgi:app")
+    
     app.run(
         host=Config.HOST,
         port=Config.PORT,
@@ -7,15 +7,36 @@
 
 import os
 import sys
-import librosa
 import numpy as np
-from pydub import AudioSegment
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')  # 使用非交互式后端
+
+# pydub 样本宽度（字节）-> 对应的有符号整数类型
+_SAMPLE_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+def segment_to_float32(audio):
+    """
+    将已解码的 AudioSegment 转为单声道 float32 波形（范围 [-1, 1)）
+
+    直接复用内存中的 PCM 数据，避免再次调用 librosa.load 重新解码文件
+
+    Returns:
+        (波形数组, 采样率)
+    """
+    if audio.sample_width not in _SAMPLE_DTYPES:
+        audio = audio.set_sample_width(2)
+    samples = np.frombuffer(audio.raw_data, dtype=_SAMPLE_DTYPES[audio.sample_width])
+    scale = float(1 << (8 * audio.sample_width - 1))
+    if audio.channels > 1:
+        y = samples.reshape(-1, audio.channels).mean(axis=1, dtype=np.float32) / scale
+    else:
+        y = samples.astype(np.float32) / scale
+    return y, audio.frame_rate
 
 def analyze_audio_file(file_path):
     """分析音频文件的技术参数和特征"""
+    # librosa、pydub 加载较重，只在真正分析时导入
+    import librosa
+    from pydub import AudioSegment
+    
     print(f"\n=== 分析文件: {os.path.basename(file_path)} ===")
     
     if not os.path.exists(file_path):
@@ -33,8 +54,8 @@ def analyze_audio_file(file_path):
         print(f"样本宽度: {audio.sample_width} 字节")
         print(f"比特率: {audio.frame_rate * audio.channels * audio.sample_width * 8} bps")
         
-        # 使用librosa进行更详细的分析
-        y, sr = librosa.load(file_path, sr=None)
+        # 复用pydub已解码的PCM数据进行更详细的分析，不再重复解码
+        y, sr = segment_to_float32(audio)
         
         print(f"\n--- 音频质量分析 ---")
         print(f"实际采样率: {sr} Hz")
@@ -56,26 +77,27 @@ def analyze_audio_file(file_path):
         silence_percentage = (silence_samples / len(y)) * 100
         print(f"静音比例: {silence_percentage:.2f}%")
         
-        # 频谱分析
-        stft = librosa.stft(y)
+        # 频谱分析：只做一次STFT，质心、MFCC、帧能量都基于同一份频谱计算
+        n_fft = 2048
+        hop_length = 512
+        stft = librosa.stft(y, n_fft=n_fft, hop_length=hop_length)
         magnitude = np.abs(stft)
+        power = magnitude ** 2
         
         # 计算频谱质心
-        spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)
+        spectral_centroids = librosa.feature.spectral_centroid(S=magnitude, sr=sr, n_fft=n_fft)
         mean_spectral_centroid = np.mean(spectral_centroids)
         print(f"频谱质心: {mean_spectral_centroid:.2f} Hz")
         
-        # 计算MFCC特征
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+        # 计算MFCC特征（由功率谱得到梅尔谱，不再重复计算STFT）
+        mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=power, sr=sr))
+        mfccs = librosa.feature.mfcc(S=mel_db, n_mfcc=13)
         print(f"MFCC特征形状: {mfccs.shape}")
         print(f"MFCC均值: {np.mean(mfccs, axis=1)[:5]}")  # 显示前5个系数的均值
         
         # 检测语音活动
-        # 使用简单的能量阈值检测
-        frame_length = 2048
-        hop_length = 512
-        frames = librosa.util.frame(y, frame_length=frame_length, hop_length=hop_length)
-        frame_energy = np.sum(frames**2, axis=0)
+        # 使用简单的能量阈值检测，帧能量直接取自功率谱
+        frame_energy = power.sum(axis=0)
         energy_threshold = np.percentile(frame_energy, 20)  # 使用20%分位数作为阈值
         
         voice_frames = np.sum(frame_energy > energy_threshold)
@@ -83,7 +105,7 @@ def analyze_audio_file(file_path):
         print(f"语音活动比例: {voice_percentage:.2f}%")
         
         # 频率范围分析
-        freqs = librosa.fft_frequencies(sr=sr)
+        freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
         magnitude_mean = np.mean(magnitude, axis=1)
         
         # 找到主要能量分布的频率范围
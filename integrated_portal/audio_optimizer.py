@@ -7,12 +7,89 @@
 
 import os
 import sys
-import librosa
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from pydub import AudioSegment
 from pydub.effects import normalize, compress_dynamic_range
 import argparse
 
+from audio_analyzer import segment_to_float32
+
+def remove_silence_chunks(audio, chunk_length=100, gap_length=50, threshold_ratio=0.01):
+    """
+    按固定时长分块去除静音段，每段语音之后保留一小段静音作为间隔
+
+    用 NumPy 一次性计算所有分块的 RMS 并按连续语音段整体拼接，
+    避免逐块切片、逐块计算 rms 以及 AudioSegment 逐个相加带来的大量内存复制
+
+    Args:
+        audio: 单声道 AudioSegment
+        chunk_length: 分块时长（毫秒）
+        gap_length: 语音段之间保留的静音时长（毫秒）
+        threshold_ratio: 静音阈值相对最大振幅的比例（0.01 约为 -40dB）
+
+    Returns:
+        AudioSegment: 去除静音后的音频；全部为静音时原样返回
+    """
+    if audio.sample_width != 2:
+        audio = audio.set_sample_width(2)
+    samples = np.frombuffer(audio.raw_data, dtype=np.int16)
+    frame = max(audio.frame_rate * chunk_length // 1000, 1)
+    silence_threshold = audio.max_possible_amplitude * threshold_ratio
+    
+    # 每个分块的 RMS（末尾不足一块的部分单独计算）
+    n_full = len(samples) // frame
+    squares = samples.astype(np.float64) ** 2
+    rms = np.sqrt(squares[:n_full * frame].reshape(n_full, frame).mean(axis=1))
+    if len(samples) > n_full * frame:
+        rms = np.append(rms, np.sqrt(squares[n_full * frame:].mean()))
+    
+    loud = rms > silence_threshold
+    if not loud.any():
+        return audio
+    
+    # 找出连续语音段 [start, end)，以块为单位
+    edges = np.diff(np.concatenate(([0], loud.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    
+    gap = np.zeros(audio.frame_rate * gap_length // 1000, dtype=np.int16)
+    pieces = []
+    for start, end in zip(starts, ends):
+        pieces.append(samples[start * frame:end * frame])
+        # 语音段后面还有静音块时，保留一小段静音作为间隔
+        if end < len(loud):
+            pieces.append(gap)
+    
+    out = np.concatenate(pieces)
+    return AudioSegment(
+        out.tobytes(),
+        sample_width=audio.sample_width,
+        frame_rate=audio.frame_rate,
+        channels=audio.channels
+    )
+
+def export_mp3(audio, output_file, bitrate='128k'):
+    """
+    通过管道把 PCM 数据直接送入 ffmpeg 编码为 MP3
+
+    跳过 pydub export 的临时 WAV 文件和格式探测，只启动一次 ffmpeg
+    """
+    if audio.sample_width != 2:
+        audio = audio.set_sample_width(2)
+    command = [
+        AudioSegment.converter, '-y', '-loglevel', 'error',
+        '-f', 's16le', '-ar', str(audio.frame_rate), '-ac', str(audio.channels),
+        '-i', 'pipe:0',
+        '-b:a', bitrate, '-f', 'mp3', output_file
+    ]
+    result = subprocess.run(command, input=audio.raw_data,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg 编码失败: {result.stderr.decode('utf-8', errors='ignore').strip()}")
+    return output_file
+
 def optimize_audio_for_asr(input_file, output_file=None, target_sample_rate=24000, 
                           enhance_volume=True, remove_silence=True, 
                           normalize_audio=True, compress_audio=True):
@@ -78,36 +155,12 @@ def optimize_audio_for_asr(input_file, output_file=None, target_sample_rate=2400
         # 6. 去除静音段
         if remove_silence:
             print("去除静音段...")
-            # 检测静音段（低于-40dB的部分）
-            silence_threshold = audio.max_possible_amplitude * 0.01  # -40dB
-            
-            # 分割音频为小段，去除静音
-            chunk_length = 100  # 100ms chunks
-            chunks = []
-            
-            for i in range(0, len(audio), chunk_length):
-                chunk = audio[i:i + chunk_length]
-                if chunk.rms > silence_threshold:
-                    chunks.append(chunk)
-                elif len(chunks) > 0 and chunks[-1].rms > silence_threshold:
-                    # 保留一些静音作为间隔
-                    silence_chunk = AudioSegment.silent(duration=50)  # 50ms静音
-                    chunks.append(silence_chunk)
-            
-            if chunks:
-                audio = sum(chunks)
-                print(f"去除静音后时长: {len(audio) / 1000:.2f} 秒")
-        
-        # 7. 设置输出格式参数
-        export_params = {
-            "format": "mp3",
-            "bitrate": "128k",
-            "parameters": ["-ar", str(target_sample_rate), "-ac", "1"]
-        }
+            audio = remove_silence_chunks(audio)
+            print(f"去除静音后时长: {len(audio) / 1000:.2f} 秒")
         
-        # 导出优化后的音频
+        # 7. 导出优化后的音频（此时已是单声道、目标采样率）
         print("导出优化后的音频...")
-        audio.export(output_file, **export_params)
+        export_mp3(audio, output_file, bitrate='128k')
         
         # 显示优化后的信息
         optimized_audio = AudioSegment.from_file(output_file)
@@ -125,24 +178,43 @@ def optimize_audio_for_asr(input_file, output_file=None, target_sample_rate=2400
         print(f"音频优化失败: {e}")
         return None
 
+def _mean_spectral_centroid(y, sr, n_fft=2048, hop_length=512, block_frames=1024):
+    """
+    计算平均频谱质心（与 librosa.feature.spectral_centroid 默认参数一致：
+    Hann 窗、居中补零分帧），按帧分块做 rfft 以控制内存占用
+    """
+    y = np.pad(y, n_fft // 2)
+    frames = np.lib.stride_tricks.sliding_window_view(y, n_fft)[::hop_length]
+    window = np.hanning(n_fft + 1)[:-1].astype(np.float32)
+    freqs = np.fft.rfftfreq(n_fft, d=1.0 / sr)
+    
+    centroid_sum = 0.0
+    for i in range(0, len(frames), block_frames):
+        magnitude = np.abs(np.fft.rfft(frames[i:i + block_frames] * window, axis=1))
+        total = magnitude.sum(axis=1)
+        weighted = magnitude @ freqs
+        # 无能量的帧质心记为0
+        centroid_sum += np.divide(weighted, total, out=np.zeros_like(weighted), where=total > 0).sum()
+    return centroid_sum / len(frames)
+
 def analyze_audio_quality(file_path):
     """分析音频质量"""
     try:
-        # 使用librosa分析
-        y, sr = librosa.load(file_path, sr=None)
+        # 用pydub解码一次，直接取内存中的PCM数据分析
+        y, sr = segment_to_float32(AudioSegment.from_file(file_path))
         
         # 计算基本统计信息
-        rms_energy = np.sqrt(np.mean(y**2))
+        rms_energy = np.sqrt(np.mean(y * y))
         max_amplitude = np.max(np.abs(y))
-        zero_crossing_rate = np.mean(librosa.feature.zero_crossing_rate(y))
+        signs = np.signbit(y)
+        zero_crossing_rate = np.mean(signs[1:] != signs[:-1])
         
         # 计算静音比例
         silence_threshold = 0.01
-        silence_frames = np.sum(np.abs(y) < silence_threshold)
-        silence_percentage = (silence_frames / len(y)) * 100
+        silence_percentage = np.mean(np.abs(y) < silence_threshold) * 100
         
         # 计算频谱质心
-        spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=y, sr=sr))
+        spectral_centroid = _mean_spectral_centroid(y, sr)
         
         print(f"\n音频质量分析:")
         print(f"  RMS能量: {rms_energy:.6f}")
@@ -163,37 +235,21 @@ def analyze_audio_quality(file_path):
         print(f"音频质量分析失败: {e}")
         return None
 
-def main():
-    """主函数"""
-    parser = argparse.ArgumentParser(description='音频优化工具 - 提高ASR识别率')
-    parser.add_argument('input_file', help='输入音频文件路径')
-    parser.add_argument('-o', '--output', help='输出音频文件路径')
-    parser.add_argument('-sr', '--sample-rate', type=int, default=24000, help='目标采样率 (默认: 24000)')
-    parser.add_argument('--no-volume', action='store_true', help='不增强音量')
-    parser.add_argument('--no-silence', action='store_true', help='不去除静音')
-    parser.add_argument('--no-normalize', action='store_true', help='不标准化音频')
-    parser.add_argument('--no-compress', action='store_true', help='不压缩动态范围')
-    parser.add_argument('--analyze-only', action='store_true', help='仅分析音频质量，不进行优化')
-    
-    args = parser.parse_args()
-    
-    if not os.path.exists(args.input_file):
-        print(f"错误: 输入文件不存在: {args.input_file}")
-        return 1
-    
+def _optimize_one(input_file, output_file, args):
+    """分析并优化单个文件，返回是否成功（批量模式下在子进程中执行）"""
     # 分析音频质量
     print("=" * 50)
-    print("分析原始音频质量...")
-    analyze_audio_quality(args.input_file)
+    print(f"分析原始音频质量: {input_file}")
+    analyze_audio_quality(input_file)
     
     if args.analyze_only:
-        return 0
+        return True
     
     # 优化音频
     print("=" * 50)
     output_file = optimize_audio_for_asr(
-        input_file=args.input_file,
-        output_file=args.output,
+        input_file=input_file,
+        output_file=output_file,
         target_sample_rate=args.sample_rate,
         enhance_volume=not args.no_volume,
         remove_silence=not args.no_silence,
@@ -206,6 +262,46 @@ def main():
         print("=" * 50)
         print("分析优化后音频质量...")
         analyze_audio_quality(output_file)
+        return True
+    return False
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='音频优化工具 - 提高ASR识别率')
+    parser.add_argument('input_files', nargs='+', metavar='input_file', help='输入音频文件路径（可指定多个）')
+    parser.add_argument('-o', '--output', help='输出音频文件路径（仅限单个输入文件）')
+    parser.add_argument('-sr', '--sample-rate', type=int, default=24000, help='目标采样率 (默认: 24000)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='批量处理时的并行进程数 (默认: CPU核数)')
+    parser.add_argument('--no-volume', action='store_true', help='不增强音量')
+    parser.add_argument('--no-silence', action='store_true', help='不去除静音')
+    parser.add_argument('--no-normalize', action='store_true', help='不标准化音频')
+    parser.add_argument('--no-compress', action='store_true', help='不压缩动态范围')
+    parser.add_argument('--analyze-only', action='store_true', help='仅分析音频质量，不进行优化')
+    
+    args = parser.parse_args()
+    
+    if args.output and len(args.input_files) > 1:
+        print("错误: 指定多个输入文件时不能使用 -o/--output")
+        return 1
+    
+    for input_file in args.input_files:
+        if not os.path.exists(input_file):
+            print(f"错误: 输入文件不存在: {input_file}")
+            return 1
+    
+    if len(args.input_files) == 1:
+        results = [_optimize_one(args.input_files[0], args.output, args)]
+    else:
+        # 多个文件时按进程并行处理，各自的 ffmpeg 编码也随之并行
+        jobs = max(1, min(args.jobs, len(args.input_files)))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(_optimize_one, f, None, args) for f in args.input_files]
+            results = [future.result() for future in futures]
+    
+    if args.analyze_only:
+        return 0
+    
+    if all(results):
         print("=" * 50)
         print("优化建议:")
         print("1. 将优化后的音频文件上传到会议纪要系统")
@@ -228,6 +324,6 @@ if __name__ == "__main__":
                 analyze_audio_quality(output_file)
         else:
             print(f"测试文件不存在: {input_file}")
-            print("使用方法: python audio_optimizer.py <输入文件> [-o 输出文件]")
+            print("使用方法: python audio_optimizer.py <输入文件> [更多输入文件...] [-o 输出文件] [-j 并行数]")
     else:
         sys.exit(main())
\ No newline at end of file
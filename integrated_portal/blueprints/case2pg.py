@@ -3,9 +3,28 @@
 数据处理系统蓝图
 将case2pg系统集成到统一门户
 """
-from flask import Blueprint, render_template, render_template_string, request, jsonify, Response
+from flask import Blueprint, render_template, request, Response, current_app, make_response
 import os
 import sys
+import json
+import logging
+import hashlib
+import threading
+import time
+import orjson
+from collections import deque
+from functools import lru_cache
+from types import MappingProxyType, SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.response import ojson
+
+# 可选：多进程部署时用Redis共享表格列表缓存
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
 
 # 添加case2pg模块路径
 case2pg_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../case2pg'))
@@ -15,7 +34,7 @@ if case2pg_path not in sys.path:
 # 导入case2pg的功能模块并初始化数据库连接
 try:
     from app.db.dao import query_table, check_table_exists, delete_record, get_table_primary_key, execute_query, delete_record_by_row_index, delete_record_by_conditions
-    from app.services import guess_type, upload_file, workflow_response, forward_and_collect
+    from app.services import guess_type, upload_file, workflow_response
     from app.config import API_URL, API_KEY, USER_ID
     from app.exceptions import DatabaseError, WorkflowError, FileUploadError, ExternalAPIError
     from app.utils.response import success_response, error_response
@@ -24,25 +43,22 @@ try:
     from app.db.connection import db_manager
     from app.config.base import Config
     
-    # 初始化数据库连接池
-    class MockApp:
-        def __init__(self):
-            self.config = {}
-            self.logger = None
-            
-        def get(self, key, default=None):
-            return self.config.get(key, default)
-            
-    mock_app = MockApp()
-    # 设置数据库配置
-    mock_app.config['DATABASE_URL'] = Config.DATABASE_URL
-    mock_app.config['DB_POOL_SIZE'] = 10
-    mock_app.config['DB_MAX_OVERFLOW'] = 20
-    mock_app.config['DB_POOL_TIMEOUT'] = 30
+    # 初始化数据库连接池（连接池大小可通过环境变量调整）
+    db_config = {
+        'DATABASE_URL': Config.DATABASE_URL,
+        'DB_POOL_SIZE': int(os.environ.get('DB_POOL_SIZE', 20)),
+        'DB_MAX_OVERFLOW': int(os.environ.get('DB_MAX_OVERFLOW', 40)),
+        'DB_POOL_TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        # 取用连接前先探活，定期回收长连接，避免网络抖动后拿到失效连接
+        'DB_POOL_PRE_PING': os.environ.get('DB_POOL_PRE_PING', 'True').lower() == 'true',
+        'DB_POOL_RECYCLE': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    }
+    # db_manager.init_app 只需要 config/logger/get，不必构造 Flask 应用
+    db_app = SimpleNamespace(config=db_config, logger=None, get=db_config.get)
     
     # 初始化数据库管理器
     try:
-        db_manager.init_app(mock_app)
+        db_manager.init_app(db_app)
         print("[INFO] case2pg数据库连接池初始化成功")
     except Exception as db_init_error:
         print(f"[WARNING] case2pg数据库连接池初始化失败: {db_init_error}")
@@ -60,9 +76,8 @@ except ImportError as e:
     def guess_type(*args, **kwargs): return None
     def upload_file(*args, **kwargs): return False, "模块未加载"
     def workflow_response(*args, **kwargs): return None
-    def forward_and_collect(*args, **kwargs): return None
-    def success_response(*args, **kwargs): return jsonify({"error": "模块未加载"})
-    def error_response(*args, **kwargs): return jsonify({"error": "模块未加载"})
+    def success_response(*args, **kwargs): return ojson({"error": "模块未加载"})
+    def error_response(*args, **kwargs): return ojson({"error": "模块未加载"})
     def get_logger(*args, **kwargs): return None
     def log_api_call(*args, **kwargs): return lambda f: f
     def monitor_performance(*args, **kwargs): return lambda f: f
@@ -79,6 +94,9 @@ except ImportError as e:
     class FileUploadError(Exception): pass
     class ExternalAPIError(Exception): pass
 
+# 模块级logger，case2pg模块未加载时退回标准logging
+logger = get_logger(__name__) or logging.getLogger(__name__)
+
 # 使用Blueprint整合"数据处理系统"到统一门户
 case2pg_bp = Blueprint(
     'case2pg', __name__,
@@ -87,65 +105,368 @@ case2pg_bp = Blueprint(
     static_url_path='/case2pg/static'
 )
 
-# 全局变量用于存储最近一次工作流输出
-last_workflow_outputs = []
+# 最近一次工作流输出：只保留最近若干条事件的原始JSON字节（环形缓冲，供 /get_last_workflow_outputs 查看），
+# "问题分类器"节点在转发时即提取出来，按用户单独保存，不再保留完整输出
+WORKFLOW_EVENTS_MAXLEN = 200
+CLASSIFIER_TITLE = '问题分类器'
+_workflow_lock = threading.Lock()
+_recent_workflow_events = deque(maxlen=WORKFLOW_EVENTS_MAXLEN)
+_classifier_nodes = {}
+
+# 字节级预过滤：只有同时包含 node_finished 和分类器标题（UTF-8 或 \u 转义形式）的事件才需要解析JSON
+_NODE_FINISHED_MARKER = b'"node_finished"'
+_CLASSIFIER_MARKERS = (
+    CLASSIFIER_TITLE.encode('utf-8'),
+    json.dumps(CLASSIFIER_TITLE)[1:-1].encode('ascii'),
+    json.dumps(CLASSIFIER_TITLE)[1:-1].upper().replace('\\U', '\\u').encode('ascii'),
+)
+
+def _reset_workflow_state(user_id):
+    """新一次工作流开始时清空上一次的输出"""
+    with _workflow_lock:
+        _recent_workflow_events.clear()
+        _classifier_nodes.pop(user_id, None)
+
+def _is_classifier_candidate(payload):
+    """判断事件字节是否可能是"问题分类器"节点完成事件，无需解析JSON"""
+    if _NODE_FINISHED_MARKER not in payload:
+        return False
+    return any(marker in payload for marker in _CLASSIFIER_MARKERS)
+
+def _record_workflow_event(user_id, payload):
+    """
+    记录一条工作流事件（data: 之后的原始JSON字节）
+
+    只有命中字节预过滤的事件才解析JSON，遇到"问题分类器"节点完成事件时单独保存其数据
+    """
+    classifier = None
+    if _is_classifier_candidate(payload):
+        try:
+            obj = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            obj = None
+        if isinstance(obj, dict) and obj.get('event') == 'node_finished':
+            data = obj.get('data') or {}
+            if data.get('title') == CLASSIFIER_TITLE:
+                classifier = data
+    
+    with _workflow_lock:
+        _recent_workflow_events.append(payload)
+        if classifier is not None:
+            _classifier_nodes[user_id] = classifier
+
+def _recent_workflow_outputs():
+    """解析环形缓冲中的事件，返回JSON对象列表（无法解析的事件跳过）"""
+    with _workflow_lock:
+        payloads = list(_recent_workflow_events)
+    outputs = []
+    for payload in payloads:
+        try:
+            outputs.append(orjson.loads(payload))
+        except orjson.JSONDecodeError:
+            continue
+    return outputs
+
+def _get_workflow_classifier(user_id):
+    """
+    获取最近一次工作流的问题分类器节点
+
+    Returns:
+        (是否有工作流输出, 分类器节点数据或None)
+    """
+    with _workflow_lock:
+        return bool(_recent_workflow_events), _classifier_nodes.get(user_id)
+
+# 表格元数据：模块加载时构建一次，只读
+# 表名 -> 案件类型
+TABLE_MAPPING = MappingProxyType({
+    'case_summary': '诉讼',
+    'reconsideration_summary': '复议',
+    'contract_summary': '合同'
+})
+
+# 表名 -> 主键
+PRIMARY_KEY_MAPPING = MappingProxyType({
+    'case_summary': '案号',
+    'reconsideration_summary': '案号',
+    'contract_summary': '合同号'
+})
+
+# 问题分类器 class_name -> 表名
+CLASS_TO_TABLE = MappingProxyType({
+    '合同': 'contract_summary',
+    '复议': 'reconsideration_summary',
+    '诉讼': 'case_summary'
+})
+
+# 可用的表格及其信息
+AVAILABLE_TABLES = (
+    {
+        'table_name': 'case_summary',
+        'display_name': '行政复议案件汇总',
+        'class_name': '复议',
+        'primary_key': '案号'
+    },
+    {
+        'table_name': 'reconsideration_summary',
+        'display_name': '行政复议案件汇总',
+        'class_name': '复议',
+        'primary_key': '案号'
+    },
+    {
+        'table_name': 'contract_summary',
+        'display_name': '合同案件汇总',
+        'class_name': '合同',
+        'primary_key': '合同号'
+    }
+)
+
+# 可用表格的存在性和记录数短时缓存（秒）
+AVAILABLE_TABLES_TTL = 30
+_tables_cache_lock = threading.Lock()
+_tables_cache = {'expires_at': 0.0, 'data': None}
+
+# 配置 CASE2PG_REDIS_URL 后，各worker进程通过Redis共享同一份表格列表缓存
+TABLES_CACHE_REDIS_URL = os.environ.get('CASE2PG_REDIS_URL')
+TABLES_CACHE_REDIS_KEY = 'case2pg:tables'
+_redis_client = None
+if TABLES_CACHE_REDIS_URL:
+    if REDIS_AVAILABLE:
+        _redis_client = redis.Redis.from_url(
+            TABLES_CACHE_REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+    else:
+        logger.warning('已配置 CASE2PG_REDIS_URL 但未安装 redis，表格列表仅使用进程内缓存')
+
+# 一次查询所有表的存在性和估算行数（pg_class.reltuples 来自统计信息，无需全表扫描）
+_TABLE_STATS_QUERY = (
+    "SELECT relname, reltuples::bigint AS count FROM pg_class "
+    "WHERE relname = ANY(%s) AND relkind IN ('r', 'p') AND pg_table_is_visible(oid)"
+)
+
+def _get_table_stats(available_tables):
+    """查询各表是否存在及记录数，返回附带 exists、record_count 的表信息列表"""
+    names = [t['table_name'] for t in available_tables]
+    rows = execute_query(_TABLE_STATS_QUERY, (names,), fetch_all=True) or []
+    estimates = {row['relname']: row['count'] for row in rows}
+    
+    result_tables = []
+    for table_info in available_tables:
+        table_name = table_info['table_name']
+        table_info = dict(table_info)
+        if table_name not in estimates:
+            table_info['exists'] = False
+            table_info['record_count'] = 0
+        else:
+            record_count = estimates[table_name]
+            if record_count <= 0:
+                # 从未 ANALYZE 过的表没有统计信息（-1 或 0），小表直接精确计数
+                try:
+                    count_result = execute_query(f"SELECT COUNT(*) as count FROM {table_name}", fetch_all=False)
+                    record_count = count_result['count'] if count_result else 0
+                except Exception as e:
+                    logger.warning(f'获取表 {table_name} 记录数失败: {e}')
+                    record_count = 0
+            table_info['exists'] = True
+            table_info['record_count'] = record_count
+        result_tables.append(table_info)
+    return result_tables
+
+def _get_shared_table_stats():
+    """从Redis读取共享的表格列表缓存，未配置、未命中或Redis不可用时返回None"""
+    if _redis_client is None:
+        return None
+    try:
+        raw = _redis_client.get(TABLES_CACHE_REDIS_KEY)
+        return orjson.loads(raw) if raw else None
+    except orjson.JSONDecodeError as e:
+        logger.warning(f'Redis表格列表缓存内容无法解析，改为查询数据库: {e}')
+    except redis.RedisError as e:
+        logger.warning(f'读取Redis表格列表缓存失败: {e}')
+    return None
+
+def _set_shared_table_stats(data):
+    """把表格列表写入Redis，AVAILABLE_TABLES_TTL 秒后过期"""
+    if _redis_client is None:
+        return
+    try:
+        _redis_client.setex(TABLES_CACHE_REDIS_KEY, AVAILABLE_TABLES_TTL, orjson.dumps(data))
+    except redis.RedisError as e:
+        logger.warning(f'写入Redis表格列表缓存失败: {e}')
+
+def _get_table_stats_cached(available_tables):
+    """
+    带 AVAILABLE_TABLES_TTL 秒缓存的 _get_table_stats，进程内缓存未命中时再查Redis共享缓存
+
+    Redis 和数据库查询在锁外进行，锁只保护进程内缓存的读写，慢查询不会阻塞其他请求
+    """
+    with _tables_cache_lock:
+        if _tables_cache['data'] is not None and _tables_cache['expires_at'] > time.monotonic():
+            return _tables_cache['data']
+    
+    data = _get_shared_table_stats()
+    if data is None:
+        data = _get_table_stats(available_tables)
+        _set_shared_table_stats(data)
+    
+    with _tables_cache_lock:
+        _tables_cache['data'] = data
+        _tables_cache['expires_at'] = time.monotonic() + AVAILABLE_TABLES_TTL
+    return data
+
+# 表格数据在数据库端直接组装为 [[...], ...] JSON 文本，Python 端只做一次 orjson 解析。
+# 日期、时间戳、NUMERIC 在SQL中转换为与 query_table + jsonify 相同的渲染
+# （HTTP日期字符串、Decimal 字符串），两条查询路径返回的格式一致
+_TABLE_COLUMNS_QUERY = (
+    "SELECT attname, format_type(atttypid, NULL) AS type FROM pg_attribute "
+    "WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped ORDER BY attnum"
+)
+_HTTP_DATE_FORMAT = 'Dy, DD Mon YYYY HH24:MI:SS "GMT"'
+_COLUMN_RENDERERS = MappingProxyType({
+    'date': "to_char({col}, 'Dy, DD Mon YYYY \"00:00:00 GMT\"')",
+    'timestamp without time zone': f"to_char({{col}}, '{_HTTP_DATE_FORMAT}')",
+    'timestamp with time zone': f"to_char({{col}} AT TIME ZONE 'UTC', '{_HTTP_DATE_FORMAT}')",
+    'numeric': "{col}::text",
+})
+# 行号按子查询产出顺序编号，聚合时按行号排序，行顺序与 query_table 的扫描顺序一致且稳定
+_TABLE_ROWS_JSON_QUERY = (
+    "SELECT COALESCE(json_agg((SELECT json_agg(e.value ORDER BY e.ord) "
+    "FROM json_each(row_to_json(c)) WITH ORDINALITY AS e(key, value, ord)) ORDER BY r.__rn), "
+    "'[]'::json)::text AS payload "
+    "FROM (SELECT row_number() OVER () AS __rn, t.* FROM (SELECT * FROM {table} LIMIT %s) t) r "
+    "CROSS JOIN LATERAL (SELECT {columns}) c"
+)
+
+def _quote_ident(name):
+    """引用SQL标识符"""
+    return '"' + name.replace('"', '""') + '"'
+
+def _query_table_as_json(table_name, limit):
+    """
+    查询表格数据，返回 (列名列表, 行列表)
+
+    table_name 会直接拼入SQL，调用方必须保证其在白名单内
+    """
+    column_rows = execute_query(_TABLE_COLUMNS_QUERY, (table_name,), fetch_all=True) or []
+    if not column_rows:
+        return [], []
+    
+    columns = [row['attname'] for row in column_rows]
+    select_list = []
+    for row in column_rows:
+        col = _quote_ident(row['attname'])
+        expr = _COLUMN_RENDERERS.get(row['type'], '{col}').format(col=f'r.{col}')
+        select_list.append(f'{expr} AS {col}')
+    
+    query = _TABLE_ROWS_JSON_QUERY.format(table=table_name, columns=', '.join(select_list))
+    result = execute_query(query, (limit,), fetch_all=False)
+    rows = orjson.loads(result['payload']) if result else []
+    # 与 query_table 路径一致：没有数据时不返回列名
+    return (columns if rows else []), rows
+
+# 多文件上传到Dify时并发执行，每个上传都是I/O等待
+UPLOAD_MAX_WORKERS = 8
+_upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_MAX_WORKERS, thread_name_prefix='case2pg-upload')
+
+def _upload_one(index, f):
+    """
+    上传单个文件到Dify并识别文件类型
+
+    Returns:
+        (是否成功, 上传结果或错误信息, 文件类型)
+    """
+    logger.info(f'处理文件 {index + 1}: {f.filename}')
+    
+    # 上传到 Dify API
+    success, result = upload_file(f, API_URL, API_KEY, USER_ID)
+    logger.debug(f'文件上传结果: success={success}, result={result}')
+    if not success:
+        return success, result, None
+    return success, result, guess_type(f)
+
+def forward_and_extract(resp, sink):
+    """
+    原样转发工作流SSE字节流，同时把每个 data 事件的原始字节交给 sink 处理
+
+    Args:
+        resp: 工作流的流式响应对象
+        sink: 接收 data: 之后JSON字节的回调
+    """
+    pending = b''
+    for chunk in resp.iter_content(chunk_size=None):
+        if not chunk:
+            continue
+        yield chunk
+        
+        pending += chunk
+        if b'\n' not in chunk:
+            continue
+        lines = pending.split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            line = line.strip()
+            if line.startswith(b'data:'):
+                sink(line[5:].lstrip())
+
+# 原子系统主页模板：首次访问时读取并编译，之后复用
+INDEX_TEMPLATE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../case2pg/app/templates/index.html'))
+INDEX_MAX_AGE = 60
+
+@lru_cache(maxsize=1)
+def _load_index_template():
+    """读取并编译主页模板，返回 (模板对象, ETag)；文件不存在时抛出 FileNotFoundError（不缓存）"""
+    with open(INDEX_TEMPLATE_PATH, 'rb') as f:
+        source = f.read()
+    etag = hashlib.blake2b(source, digest_size=8).hexdigest()
+    return current_app.jinja_env.from_string(source.decode('utf-8')), etag
 
 @case2pg_bp.route('/', methods=['GET'])
 def index():
     """主页路由"""
     # 避免与门户 index.html 模板冲突，直接读取原子系统模板内容渲染
-    tpl_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../case2pg/app/templates/index.html'))
     try:
-        with open(tpl_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        return render_template_string(content)
+        template, etag = _load_index_template()
     except FileNotFoundError:
         return "模板文件未找到", 404
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = make_response(render_template(template))
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = INDEX_MAX_AGE
+    return response
 
 @case2pg_bp.route('/upload', methods=['POST'])
 def upload():
     """文件上传和处理路由"""
-    global last_workflow_outputs
     try:
-        logger = get_logger(__name__) if get_logger else None
-        if logger:
-            logger.info('开始文件上传和处理')
-        
-        print("=" * 50)
-        print("[DEBUG] 收到文件上传请求")
-        print(f"[DEBUG] 开始处理上传请求")
-        print(f"[DEBUG] API_URL: {API_URL}")
-        print(f"[DEBUG] API_KEY: {API_KEY[:10]}..." if API_KEY else "[DEBUG] API_KEY: None")
-        print(f"[DEBUG] USER_ID: {USER_ID}")
-        print("=" * 50)
+        logger.info('开始文件上传和处理')
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f'API_URL: {API_URL}, API_KEY: {API_KEY[:10] + "..." if API_KEY else None}, USER_ID: {USER_ID}')
         
         files = request.files.getlist("input_data")
-        print(f"[DEBUG] 接收到 {len(files)} 个文件")
-        if logger:
-            logger.info(f'接收到 {len(files)} 个文件')
+        logger.info(f'接收到 {len(files)} 个文件')
         
         upload_file_ids = []
         file_types = []
         
-        # 处理每个上传的文件
-        for i, f in enumerate(files):
-            print(f"[DEBUG] 处理文件 {i+1}: {f.filename}")
-            if logger:
-                logger.info(f'处理文件 {i+1}: {f.filename}')
-            
-            # 上传到 Dify API
-            success, result = upload_file(f, API_URL, API_KEY, USER_ID)
-            print(f"[DEBUG] 文件上传结果: success={success}, result={result}")
-            
+        # 处理每个上传的文件：多个文件并发上传，结果按原顺序收集
+        if len(files) > 1:
+            results = list(_upload_executor.map(_upload_one, range(len(files)), files))
+        else:
+            results = [_upload_one(i, f) for i, f in enumerate(files)]
+        
+        for f, (success, result, ftype) in zip(files, results):
             if not success:
-                print(f"[ERROR] 文件上传失败: {result}")
+                logger.error(f'文件 {f.filename} 上传失败: {result}')
                 raise FileUploadError(f"文件 {f.filename} 上传失败", detail=result)
                 
             file_info = result
             upload_file_ids.append(file_info["id"])
-            file_types.append(guess_type(f))
-            if logger:
-                logger.info(f'文件上传成功，文件ID: {file_info["id"]}')
+            file_types.append(ftype)
+            logger.info(f'文件上传成功，文件ID: {file_info["id"]}')
         
         # 准备工作流请求数据
         input_data = [
@@ -165,14 +486,13 @@ def upload():
         
         # SSE流式转发
         def generate():
-            global last_workflow_outputs
-            last_workflow_outputs = []  # 每次新上传清空
+            _reset_workflow_state(USER_ID)  # 每次新上传清空
             resp2 = workflow_response(API_URL, API_KEY, payload)
+            sink = lambda obj: _record_workflow_event(USER_ID, obj)
             try:
-                for chunk in forward_and_collect(resp2, last_workflow_outputs):
+                for chunk in forward_and_extract(resp2, sink):
                     yield chunk
-                if logger:
-                    logger.info('工作流执行完成')
+                logger.info('工作流执行完成')
                 # 记录API调用指标
                 record_api_call_metric('dify_upload_and_workflow', 0, True)
             finally:
@@ -181,49 +501,49 @@ def upload():
                 except Exception:
                     pass
 
-        return Response(generate(), mimetype='text/event-stream')
+        # 禁止浏览器缓存和 nginx 等反向代理缓冲，事件逐条到达前端
+        return Response(
+            generate(),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
         
     except (FileUploadError, WorkflowError, ExternalAPIError) as e:
         # 记录失败指标
         record_api_call_metric('dify_upload_and_workflow', 0, False)
-        print(f"[ERROR] 业务异常: {e}")
+        logger.error(f'文件上传处理业务异常: {e}')
         return error_response(str(e), 400)
     except Exception as e:
         # 记录失败指标
         record_api_call_metric('dify_upload_and_workflow', 0, False)
-        print(f"[ERROR] 系统异常: {e}")
-        if logger:
-            logger.error(f'文件上传处理异常: {str(e)}', exc_info=True)
+        logger.error(f'文件上传处理异常: {str(e)}', exc_info=True)
         raise WorkflowError(f"文件处理过程中发生未知错误: {str(e)}")
 
 @case2pg_bp.route("/get_last_workflow_outputs", methods=["GET"])
 def get_last_workflow_outputs():
-    """获取最近一次工作流的输出结果"""
-    global last_workflow_outputs
+    """获取最近一次工作流的输出结果（最近 WORKFLOW_EVENTS_MAXLEN 条事件）"""
     try:
-        logger = get_logger(__name__) if get_logger else None
-        if logger:
-            logger.info('获取最近一次工作流输出')
+        logger.info('获取最近一次工作流输出')
         
-        print(f"[DEBUG] 获取最近一次工作流输出，当前数据长度: {len(last_workflow_outputs) if last_workflow_outputs else 0}")
+        last_workflow_outputs = _recent_workflow_outputs()
+        
+        logger.debug(f'当前工作流输出数据长度: {len(last_workflow_outputs)}')
         
         if not last_workflow_outputs:
-            return jsonify({
+            return ojson({
                 "status": "no_data",
                 "message": "暂无工作流输出数据",
                 "data": []
             })
         
-        return jsonify({
+        return ojson({
             "status": "success",
             "message": "获取工作流输出成功",
             "data": last_workflow_outputs
         })
         
     except Exception as e:
-        print(f"[ERROR] 获取工作流输出异常: {e}")
-        if logger:
-            logger.error(f'获取工作流输出异常: {str(e)}', exc_info=True)
+        logger.error(f'获取工作流输出异常: {str(e)}', exc_info=True)
         return error_response(f"获取工作流输出失败: {str(e)}", 500)
 
 
@@ -231,94 +551,33 @@ def get_last_workflow_outputs():
 def get_available_tables():
     """获取可用的数据库表格列表"""
     try:
-        # 定义可用的表格及其信息
-        available_tables = [
-            {
-                'table_name': 'case_summary',
-                'display_name': '行政复议案件汇总',
-                'class_name': '复议',
-                'primary_key': '案号'
-            },
-            {
-                'table_name': 'reconsideration_summary', 
-                'display_name': '行政复议案件汇总',
-                'class_name': '复议',
-                'primary_key': '案号'
-            },
-            {
-                'table_name': 'contract_summary',
-                'display_name': '合同案件汇总', 
-                'class_name': '合同',
-                'primary_key': '合同号'
-            }
-        ]
-        
-        # 检查表是否实际存在，并获取记录数
-        result_tables = []
-        for table_info in available_tables:
-            table_name = table_info['table_name']
-            if check_table_exists(table_name):
-                try:
-                    # 获取记录数
-                    rows = query_table(table_name, limit=1)
-                    count_query = f"SELECT COUNT(*) as count FROM {table_name}"
-                    count_result = execute_query(count_query, fetch_all=False)
-                    record_count = count_result['count'] if count_result else 0
-                    
-                    table_info['exists'] = True
-                    table_info['record_count'] = record_count
-                except Exception as e:
-                    logger = get_logger(__name__) if get_logger else None
-                    if logger:
-                        logger.warning(f'获取表 {table_name} 记录数失败: {e}')
-                    table_info['exists'] = True
-                    table_info['record_count'] = 0
-            else:
-                table_info['exists'] = False
-                table_info['record_count'] = 0
-            
-            result_tables.append(table_info)
+        result_tables = _get_table_stats_cached(AVAILABLE_TABLES)
         
         return success_response(result_tables)
         
     except Exception as e:
-        logger = get_logger(__name__) if get_logger else None
-        if logger:
-            logger.error(f'获取可用表格列表失败: {e}')
+        logger.error(f'获取可用表格列表失败: {e}')
         return error_response(f'获取表格列表失败: {str(e)}', 500)
 
 @case2pg_bp.route("/get_table_data", methods=["GET"])
 def get_table_data():
     """获取数据库表格数据"""
     try:
-        logger = get_logger(__name__) if get_logger else None
-        if logger:
-            logger.info('开始获取数据库表格数据')
+        logger.info('开始获取数据库表格数据')
         
         # 获取请求参数
         table_name = request.args.get('table_name')
         check_workflow = request.args.get('check_workflow')
         
-        # 尝试从工作流输出获取数据
-        workflow_outputs = get_last_workflow_outputs()
+        # 尝试从工作流输出获取数据：分类器节点已在转发时提取，这里直接查找
+        has_workflow_output, classifier_node = _get_workflow_classifier(USER_ID)
         
-        if workflow_outputs and not table_name:
+        if has_workflow_output and not table_name:
             # 如果有工作流输出且没有指定表格，根据问题分类器节点确定表格
-            if logger:
-                logger.info('检测到工作流输出，开始解析问题分类器节点')
-            
-            # 遍历所有json体，查找event为node_finished且data.title为"问题分类器"的节点
-            classifier_node = None
-            for obj in workflow_outputs:
-                if isinstance(obj, dict) and obj.get('event') == 'node_finished':
-                    data = obj.get('data', {})
-                    if data.get('title') == '问题分类器':
-                        classifier_node = data
-                        break
+            logger.info('检测到工作流输出，开始解析问题分类器节点')
             
             if not classifier_node:
-                if logger:
-                    logger.warning('未找到"问题分类器"节点')
+                logger.warning('未找到"问题分类器"节点')
                 if check_workflow:
                     return success_response({'from_workflow': False})
                 return error_response('未找到"问题分类器"节点', 400)
@@ -329,29 +588,20 @@ def get_table_data():
                 class_name = outputs.get('class_name')
             
             if not class_name:
-                if logger:
-                    logger.warning(f'"问题分类器"节点缺少class_name，outputs: {outputs}')
+                logger.warning(f'"问题分类器"节点缺少class_name，outputs: {outputs}')
                 if check_workflow:
                     return success_response({'from_workflow': False})
                 return error_response('"问题分类器"节点缺少class_name', 400)
             
             # 根据class_name确定表格
-            table_map = {
-                '合同': 'contract_summary',
-                '复议': 'reconsideration_summary',
-                '诉讼': 'case_summary'
-            }
-            
-            workflow_table_name = table_map.get(class_name)
+            workflow_table_name = CLASS_TO_TABLE.get(class_name)
             if not workflow_table_name:
-                if logger:
-                    logger.warning(f'class_name为{class_name}，无对应表格')
+                logger.warning(f'class_name为{class_name}，无对应表格')
                 if check_workflow:
                     return success_response({'from_workflow': False})
                 return error_response(f'class_name为{class_name}，无对应表格', 400)
             
-            if logger:
-                logger.info(f'工作流确定表格: {class_name} -> {workflow_table_name}')
+            logger.info(f'工作流确定表格: {class_name} -> {workflow_table_name}')
             
             # 如果是检查工作流状态的请求，返回工作流信息
             if check_workflow:
@@ -365,62 +615,45 @@ def get_table_data():
             table_name = workflow_table_name
         
         # 如果是检查工作流状态的请求且没有工作流输出，返回空结果
-        if check_workflow and not workflow_outputs:
-            if logger:
-                logger.info('检查工作流状态：无工作流输出')
+        if check_workflow and not has_workflow_output:
+            logger.info('检查工作流状态：无工作流输出')
             return success_response({'from_workflow': False})
         
         # 如果没有指定表格名称，返回错误
         if not table_name:
-            if logger:
-                logger.warning('未指定表格名称')
+            logger.warning('未指定表格名称')
             return error_response('请选择要查看的表格', 400)
         
-        # 表格映射和类型映射
-        table_mapping = {
-            'case_summary': '诉讼',
-            'reconsideration_summary': '复议', 
-            'contract_summary': '合同'
-        }
-        
-        # 主键映射
-        primary_key_mapping = {
-            'case_summary': '案号',
-            'reconsideration_summary': '案号',
-            'contract_summary': '合同号'
-        }
-        
         # 检查表是否存在
         if not check_table_exists(table_name):
-            if logger:
-                logger.warning(f'表 {table_name} 不存在')
+            logger.warning(f'表 {table_name} 不存在')
             return success_response({
-                'class_name': table_mapping.get(table_name, '未知'),
+                'class_name': TABLE_MAPPING.get(table_name, '未知'),
                 'table_name': table_name,
-                'primary_key': primary_key_mapping.get(table_name, 'id'),
+                'primary_key': PRIMARY_KEY_MAPPING.get(table_name, 'id'),
                 'columns': [],
                 'rows': [],
                 'total_count': 0
             })
         
-        # 查询表格数据
-        rows = query_table(table_name, limit=1000)
-        
-        # 获取列名（从第一行数据推断）
-        columns = list(rows[0].keys()) if rows else []
-        
-        # 转换为列表格式
-        rows_list = []
-        for row in rows:
-            rows_list.append(list(row.values()))
+        # 查询表格数据：已知表在数据库端组装JSON，避免逐行逐列构造Python对象
+        if table_name in TABLE_MAPPING:
+            columns, rows_list = _query_table_as_json(table_name, 1000)
+        else:
+            rows = query_table(table_name, limit=1000)
+            
+            # 获取列名（从第一行数据推断）
+            columns = list(rows[0].keys()) if rows else []
+            
+            # 转换为列表格式
+            rows_list = [list(row.values()) for row in rows]
         
-        if logger:
-            logger.info(f'数据库查询完成，返回 {len(rows_list)} 条记录')
+        logger.info(f'数据库查询完成，返回 {len(rows_list)} 条记录')
         
         return success_response({
-            'class_name': table_mapping.get(table_name, '未知'),
+            'class_name': TABLE_MAPPING.get(table_name, '未知'),
             'table_name': table_name,
-            'primary_key': primary_key_mapping.get(table_name, 'id'),
+            'primary_key': PRIMARY_KEY_MAPPING.get(table_name, 'id'),
             'columns': columns,
             'rows': rows_list,
             'total_count': len(rows_list)
@@ -430,16 +663,14 @@ def get_table_data():
         # 这些异常会被全局错误处理器处理
         raise
     except Exception as e:
-        print(f"[ERROR] 获取表格数据异常: {str(e)}")
+        logger.error(f'获取表格数据异常: {str(e)}', exc_info=True)
         raise DatabaseError(f'获取表格数据时发生未知错误: {str(e)}')
 
 @case2pg_bp.route("/delete_record", methods=["POST"])
 def delete_record_api():
     """删除数据库记录"""
     try:
-        logger = get_logger(__name__) if get_logger else None
-        if logger:
-            logger.info('开始删除数据库记录')
+        logger.info('开始删除数据库记录')
         
         # 获取请求参数
         data = request.get_json()
@@ -467,8 +698,7 @@ def delete_record_api():
         else:
             return error_response('必须提供record_id、row_index或delete_conditions中的一个', 400)
         
-        if logger:
-            logger.info(f'删除记录 - 表: {table_name}, 方式: {delete_method}, 参数: {delete_param}')
+        logger.info(f'删除记录 - 表: {table_name}, 方式: {delete_method}, 参数: {delete_param}')
         
         # 执行删除操作
         import time
@@ -483,14 +713,12 @@ def delete_record_api():
             
             delete_duration = time.time() - start_time
             record_database_metric(delete_duration)
-            if logger:
-                logger.info(f'删除操作完成，耗时: {delete_duration:.3f}s，删除 {deleted_count} 条记录')
+            logger.info(f'删除操作完成，耗时: {delete_duration:.3f}s，删除 {deleted_count} 条记录')
             
         except DatabaseError as e:
             delete_duration = time.time() - start_time
             record_database_metric(delete_duration)
-            if logger:
-                logger.error(f'删除操作失败: {str(e)}')
+            logger.error(f'删除操作失败: {str(e)}')
             return error_response(str(e), 500)
         
         return success_response({
@@ -504,9 +732,7 @@ def delete_record_api():
         # 这些异常会被全局错误处理器处理
         raise
     except Exception as e:
-        logger = get_logger(__name__) if get_logger else None
-        if logger:
-            logger.error(f'删除记录异常: {str(e)}')
+        logger.error(f'删除记录异常: {str(e)}')
         return error_response(f'删除记录失败: {str(e)}', 500)
 
 # 监控相关路由
@@ -519,16 +745,12 @@ def health_check():
         if health_status['status'] == 'healthy':
             return success_response(health_status, '系统健康')
         else:
-            return jsonify(health_status), 503  # Service Unavailable
+            return ojson(health_status, 503)  # Service Unavailable
             
     except Exception as e:
-        logger = get_logger(__name__) if get_logger else None
-        if logger:
-            logger.error(f'健康检查失败: {str(e)}', exc_info=True)
+        logger.error(f'健康检查失败: {str(e)}', exc_info=True)
         return error_response(f'健康检查失败: {str(e)}', 500)
 
-# 获取logger实例
-logger = get_logger(__name__)
 
 @case2pg_bp.route('/api/monitoring/metrics', methods=['GET'])
 def get_system_metrics():
@@ -538,9 +760,7 @@ def get_system_metrics():
         return success_response(metrics, '获取指标成功')
         
     except Exception as e:
-        logger = get_logger(__name__) if get_logger else None
-        if logger:
-            logger.error(f'获取指标失败: {str(e)}', exc_info=True)
+        logger.error(f'获取指标失败: {str(e)}', exc_info=True)
         return error_response(f'获取指标失败: {str(e)}', 500)
 
 
@@ -552,9 +772,7 @@ def check_system_alerts():
         return success_response({}, '告警检查完成')
         
     except Exception as e:
-        logger = get_logger(__name__) if get_logger else None
-        if logger:
-            logger.error(f'告警检查失败: {str(e)}', exc_info=True)
+        logger.error(f'告警检查失败: {str(e)}', exc_info=True)
         return error_response(f'告警检查失败: {str(e)}', 500)
 
 
@@ -584,9 +802,7 @@ def system_status():
         return success_response(status, '获取系统状态成功')
         
     except Exception as e:
-        logger = get_logger(__name__) if get_logger else None
-        if logger:
-            logger.error(f'获取系统状态失败: {str(e)}', exc_info=True)
+        logger.error(f'获取系统状态失败: {str(e)}', exc_info=True)
         return error_response(f'获取系统状态失败: {str(e)}', 500)
 
 
@@ -613,12 +829,5 @@ def get_recent_logs():
         return success_response(logs, '日志查询接口')
         
     except Exception as e:
-        logger = get_logger(__name__) if get_logger else None
-        if logger:
-            logger.error(f'获取日志失败: {str(e)}', exc_info=True)
+        logger.error(f'获取日志失败: {str(e)}', exc_info=True)
         return error_response(f'获取日志失败: {str(e)}', 500)
-
-def get_last_workflow_outputs():
-    """获取最近一次工作流输出"""
-    global last_workflow_outputs
-    return last_workflow_outputs
\ No newline at end of file
@@ -2,10 +2,23 @@
 # -*- coding: utf-8 -*-
 from flask import Blueprint, render_template, render_template_string, request, redirect, url_for, flash, Response, stream_with_context, jsonify
 import os
+import sys
 import requests
-import json
-import zipfile
-import xml.etree.ElementTree as ET
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 复用智能文件撰写系统的文档处理模块
+writing_sys_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../Dify-artilcle-writing-sys'))
+if writing_sys_path not in sys.path:
+    sys.path.append(writing_sys_path)
+
+from docx_utils import file_to_dify_input, is_docx, extract_docx_text, extract_txt_text
 
 # 使用Blueprint整合“智能文件撰写系统”到统一门户
 writing_bp = Blueprint(
@@ -18,123 +31,19 @@ writing_bp = Blueprint(
 DIFY_API_BASE_URL = os.environ.get('DIFY_API_BASE_URL', 'http://localhost/v1')
 DIFY_API_TOKEN = os.environ.get('DIFY_API_TOKEN', 'app-C8SM64mhiX4oOqAXlsDei8Qu')
 
-# 文件类型映射
-EXT_TYPE_MAP = {
-    'application/pdf': 'pdf',
-    'application/msword': 'doc',
-    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'docx',
-    'text/plain': 'txt',
-    'text/markdown': 'markdown',
-    'text/html': 'html',
-    'application/vnd.ms-excel': 'xls',
-    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'xlsx',
-    'application/vnd.ms-powerpoint': 'ppt',
-    'application/vnd.openxmlformats-officedocument.presentationml.presentation': 'pptx',
-    'application/xml': 'xml',
-    'application/epub+zip': 'epub',
-    'image/jpeg': 'jpg',
-    'image/png': 'png',
-    'image/gif': 'gif',
-    'image/webp': 'webp',
-    'image/svg+xml': 'svg',
-    'audio/mpeg': 'mp3',
-    'audio/mp4': 'm4a',
-    'audio/wav': 'wav',
-    'audio/webm': 'webm',
-    'audio/amr': 'amr',
-    'video/mp4': 'mp4',
-    'video/quicktime': 'mov',
-    'video/mpeg': 'mpeg',
-    'audio/mpga': 'mpga',
-}
-EXT_FILETYPE_MAP = {
-    'pdf': 'document', 'doc': 'document', 'docx': 'document', 'txt': 'document', 'md': 'document', 'markdown': 'document', 'html': 'document',
-    'xls': 'document', 'xlsx': 'document', 'ppt': 'document', 'pptx': 'document', 'xml': 'document', 'epub': 'document',
-    'csv': 'document', 'eml': 'document', 'msg': 'document',
-    'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'gif': 'image', 'webp': 'image', 'svg': 'image',
-    'mp3': 'audio', 'm4a': 'audio', 'wav': 'audio', 'webm': 'audio', 'amr': 'audio', 'mpga': 'audio',
-    'mp4': 'video', 'mov': 'video', 'mpeg': 'video',
-}
-
-def guess_type(file):
-    mime = getattr(file, 'mimetype', None)
-    ext = EXT_TYPE_MAP.get(mime)
-    if not ext:
-        ext = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
-    return EXT_FILETYPE_MAP.get(ext, 'custom')
-
-def file_to_dify_input(file, file_id):
-    file_type = guess_type(file)
-    return {
-        'type': file_type,
-        'upload_file_id': file_id,
-        'transfer_method': 'local_file'
-    }
-
-def extract_txt_text(file_path):
-    """
-    提取txt文件的文本内容
-    """
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            print(f"提取的TXT文件内容长度: {len(content)}")
-            print(f"提取的TXT文件内容前100字符: {content[:100]}")
-            return content if content else None
-    except UnicodeDecodeError:
-        # 如果UTF-8解码失败，尝试其他编码
-        try:
-            with open(file_path, 'r', encoding='gbk') as f:
-                content = f.read().strip()
-                print(f"使用GBK编码提取的TXT文件内容长度: {len(content)}")
-                print(f"使用GBK编码提取的TXT文件内容前100字符: {content[:100]}")
-                return content if content else None
-        except Exception as e:
-            print(f"使用GBK编码提取txt文本时出错: {e}")
-            return None
-    except Exception as e:
-        print(f"提取txt文本时出错: {e}")
-        return None
-
-def extract_docx_text(file_path):
-    """
-    提取docx文档的文本内容
-    """
-    try:
-        with zipfile.ZipFile(file_path, 'r') as docx:
-            # 读取document.xml文件
-            xml_content = docx.read('word/document.xml')
-            root = ET.fromstring(xml_content)
-            
-            # 定义命名空间
-            namespaces = {
-                'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
-            }
-            
-            # 提取所有文本
-            text_elements = root.findall('.//w:t', namespaces)
-            text_content = []
-            
-            for element in text_elements:
-                if element.text:
-                    text_content.append(element.text)
-            
-            result = '\n'.join(text_content).strip()
-            print(f"提取的文档内容长度: {len(result)}")
-            print(f"提取的文档内容前100字符: {result[:100]}")
-            return result if result else None
-    except Exception as e:
-        print(f"提取docx文本时出错: {e}")
-        return None
+# 复用连接的HTTP会话，避免每次调用Dify都重新建立TCP连接
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
 
+# 模型输出中的思考过程标签
+_THINK_RE = re.compile(r'<think>.*?</think>', re.DOTALL)
 
-def filter_nones(obj):
-    if isinstance(obj, dict):
-        return {k: filter_nones(v) for k, v in obj.items() if v is not None}
-    elif isinstance(obj, list):
-        return [filter_nones(i) for i in obj if i is not None]
-    else:
-        return obj
 
 @writing_bp.route('/', methods=['GET'])
 def index():
@@ -144,74 +53,83 @@ def index():
         content = f.read()
     return render_template_string(content, result=None)
 
+def _process_upload_field(field, file, user_id):
+    """
+    处理单个上传字段：提取正文并把文件上传到Dify
+    在线程池中执行，不访问请求上下文；上传失败时直接抛出异常
+    返回 (Dify文件输入, 提取的正文)，不支持提取的格式正文为None
+    """
+    logger.debug("找到文件字段 %s: %s", field, file.filename)
+    extracted_text = None
+    # 根据文件类型提取文本内容：docx按文件头识别，txt按扩展名识别
+    if is_docx(file):
+        logger.debug("开始提取 %s 的DOCX文档内容...", field)
+        extracted_text = extract_docx_text(file.stream)
+        if extracted_text:
+            logger.debug("%s DOCX文档内容提取成功，长度: %s", field, len(extracted_text))
+        else:
+            extracted_text = "无法提取DOCX文档内容"
+            logger.debug("%s DOCX文档内容提取失败", field)
+    elif file.filename.lower().endswith('.txt'):
+        logger.debug("开始提取 %s 的TXT文件内容...", field)
+        extracted_text = extract_txt_text(file.stream)
+        if extracted_text:
+            logger.debug("%s TXT文件内容提取成功，长度: %s", field, len(extracted_text))
+        else:
+            extracted_text = "无法提取TXT文件内容"
+            logger.debug("%s TXT文件内容提取失败", field)
+    else:
+        logger.debug("%s 不是支持的文档格式，跳过内容提取", field)
+
+    url = f"{DIFY_API_BASE_URL}/files/upload"
+    headers = {"Authorization": f"Bearer {DIFY_API_TOKEN}"}
+    # 直接转发上传流，不再落盘后重新读取
+    file.stream.seek(0)
+    files_data = {'file': (file.filename, file.stream, file.mimetype)}
+    data = {'user': user_id}
+    resp = SESSION.post(url, headers=headers, files=files_data, data=data)
+    resp.raise_for_status()
+    file_id = resp.json()['id']
+    return file_to_dify_input(file, file_id), extracted_text
+
 @writing_bp.route('/upload', methods=['POST'])
 def upload():
-    print("=== /upload 接口被调用 ===")
+    logger.debug("/upload 接口被调用")
     # 处理多文件上传和参数
     user_id = request.form.get('user_id', 'demo_user')
-    print(f"用户ID: {user_id}")
+    logger.debug("用户ID: %s", user_id)
     
     files = {}
     file_contents = {}  # 存储文件内容
     file_fields = ['origin_article', 'imitate_article', 'Superior_docs']
     
-    print(f"检查的文件字段: {file_fields}")
-    print(f"请求中的文件: {list(request.files.keys())}")
+    logger.debug("检查的文件字段: %s", file_fields)
+    logger.debug("请求中的文件: %s", list(request.files.keys()))
     
+    # 各文件字段互不依赖，并行完成正文提取与上传Dify
+    uploads = {field: request.files.get(field) for field in file_fields}
+    with ThreadPoolExecutor(max_workers=len(file_fields)) as executor:
+        futures = {
+            field: executor.submit(_process_upload_field, field, file, user_id)
+            for field, file in uploads.items() if file
+        }
     for field in file_fields:
-        file = request.files.get(field)
-        if file:
-            print(f"找到文件字段 {field}: {file.filename}")
-            temp_path = os.path.join('static', file.filename)
-            file.save(temp_path)
-            
-            # 根据文件类型提取文本内容
-            if file.filename.lower().endswith('.docx'):
-                print(f"开始提取 {field} 的DOCX文档内容...")
-                extracted_text = extract_docx_text(temp_path)
-                if extracted_text:
-                    file_contents[field] = extracted_text
-                    print(f"{field} DOCX文档内容提取成功，长度: {len(extracted_text)}")
-                else:
-                    file_contents[field] = "无法提取DOCX文档内容"
-                    print(f"{field} DOCX文档内容提取失败")
-            elif file.filename.lower().endswith('.txt'):
-                print(f"开始提取 {field} 的TXT文件内容...")
-                extracted_text = extract_txt_text(temp_path)
-                if extracted_text:
-                    file_contents[field] = extracted_text
-                    print(f"{field} TXT文件内容提取成功，长度: {len(extracted_text)}")
-                else:
-                    file_contents[field] = "无法提取TXT文件内容"
-                    print(f"{field} TXT文件内容提取失败")
-            else:
-                print(f"{field} 不是支持的文档格式，跳过内容提取")
-            
-            try:
-                url = f"{DIFY_API_BASE_URL}/files/upload"
-                headers = {"Authorization": f"Bearer {DIFY_API_TOKEN}"}
-                with open(temp_path, 'rb') as f:
-                    files_data = {'file': (file.filename, f, file.mimetype)}
-                    data = {'user': user_id}
-                    resp = requests.post(url, headers=headers, files=files_data, data=data)
-                    resp.raise_for_status()
-                    file_info = resp.json()
-                    file_id = file_info['id']
-                files[field] = file_to_dify_input(file, file_id)
-            except Exception as e:
-                # flash在统一门户中未必使用，这里保持原逻辑
-                try:
-                    flash(f'{field} 文件上传失败: {e}')
-                except Exception:
-                    pass
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-                return redirect(url_for('writing.index'))
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-        else:
+        future = futures.get(field)
+        if future is None:
             files[field] = None
             file_contents[field] = None
+            continue
+        try:
+            files[field], extracted_text = future.result()
+        except Exception as e:
+            # flash在统一门户中未必使用，这里保持原逻辑
+            try:
+                flash(f'{field} 文件上传失败: {e}')
+            except Exception:
+                pass
+            return redirect(url_for('writing.index'))
+        if extracted_text is not None:
+            file_contents[field] = extracted_text
     # 组装inputs
     inputs = {
         'query': request.form.get('query', ''),
@@ -226,12 +144,12 @@ def upload():
         'Superior_docs': files['Superior_docs']
     }
     # 过滤None
-    inputs = filter_nones(inputs)
+    inputs = {k: v for k, v in inputs.items() if v is not None}
     sys_query = request.form.get('sys_query', '')
     
-    print("=== 构建响应数据 ===")
-    print(f"inputs: {inputs}")
-    print(f"file_contents: {file_contents}")
+    logger.debug("构建响应数据")
+    logger.debug("inputs: %s", inputs)
+    logger.debug("file_contents: %s", file_contents)
     
     response_data = {
         'inputs': inputs,
@@ -240,9 +158,9 @@ def upload():
         'file_contents': file_contents  # 添加文件内容到响应中
     }
     
-    print(f"最终响应数据: {response_data}")
+    logger.debug("最终响应数据: %s", response_data)
     
-    return Response(json.dumps(response_data, ensure_ascii=False), mimetype='application/json')
+    return Response(orjson.dumps(response_data), mimetype='application/json')
 
 @writing_bp.route('/stream_chat', methods=['POST'])
 def stream_chat():
@@ -267,12 +185,11 @@ def stream_chat():
                 "response_mode": "streaming",
                 "conversation_id": conversation_id
             }
-            with requests.post(url, headers=headers, json=payload, stream=True, timeout=120) as resp:
-                for line in resp.iter_lines():
-                    if line:
-                        if line.startswith(b'data:'):
-                            content = line[5:].decode('utf-8').strip()
-                            yield f"data: {content}\n\n"
+            with SESSION.post(url, headers=headers, json=payload, stream=True, timeout=120) as resp:
+                resp.raise_for_status()
+                # Dify返回的已是SSE格式，原样转发字节，不再逐行解码重组
+                for chunk in resp.iter_content(chunk_size=None):
+                    yield chunk
         except Exception as e:
             yield f"data: [ERROR] {str(e)}\n\n"
     return Response(stream_with_context(event_stream()), mimetype='text/event-stream')
@@ -305,15 +222,14 @@ def generate_ppt():
             "conversation_id": conversation_id
         }
 
-        response = requests.post(url, headers=headers, json=payload, timeout=300)
+        response = SESSION.post(url, headers=headers, json=payload, timeout=300)
         response.raise_for_status()
 
         result = response.json()
 
         # 从结果中提取answer内容并清理think标签
         raw_answer = result.get('answer', '')
-        import re
-        clean_answer = re.sub(r'<think>.*?</think>', '', raw_answer, flags=re.DOTALL)
+        clean_answer = _THINK_RE.sub('', raw_answer)
 
         return jsonify({'answer': clean_answer})
 
@@ -60,10 +60,32 @@ class Config:
     # 代理配置
     PROXY_TIMEOUT = 30  # 代理请求超时时间（秒）
     PROXY_RETRIES = 3   # 代理请求重试次数
+    PROXY_CONNECT_TIMEOUT = 3  # 代理建立连接超时时间（秒）
+    
+    # 子系统启动配置
+    SERVICE_READY_TIMEOUT = 5  # 启动接口等待子系统就绪的最长时间（秒）
+    
+    # 并发配置
+    FANOUT_POOL_WORKERS = 16  # 健康检查、服务状态查询等并发任务共用的线程数
     
     # 健康检查配置
     HEALTH_CHECK_INTERVAL = 60  # 健康检查间隔（秒）
-    HEALTH_CHECK_TIMEOUT = 15   # 健康检查超时时间（秒）
+    HEALTH_CHECK_TIMEOUT = 2    # 单个子系统健康检查超时时间（秒）
+    HEALTH_CHECK_CONNECT_TIMEOUT = 0.5  # 健康检查建立连接超时时间（秒）
+    HEALTH_CACHE_TTL = int(os.environ.get('HEALTH_CACHE_TTL', 5))  # 健康检查结果缓存时间（秒）
+    HEALTH_POLL_INTERVAL = int(os.environ.get('HEALTH_POLL_INTERVAL', 5))  # 后台健康检查轮询间隔（秒）
+    HEALTH_STREAM_KEEPALIVE = 15  # /health/stream 无更新时发送心跳的间隔（秒）
+    # /health/stream 单个连接的最长保持时间（秒），到期后关闭由 EventSource 自动重连
+    HEALTH_STREAM_MAX_AGE = int(os.environ.get('HEALTH_STREAM_MAX_AGE', 300))
+    # /health/stream 同时在线的订阅者上限；每个连接占用一个服务线程，超出时返回503
+    HEALTH_STREAM_MAX_SUBSCRIBERS = int(os.environ.get('HEALTH_STREAM_MAX_SUBSCRIBERS', 8))
+    
+    # 响应压缩配置（Flask-Compress）
+    COMPRESS_MIN_SIZE = 1024                # 小于1KB的响应不压缩
+    COMPRESS_LEVEL = 1                      # gzip 使用最快压缩级别
+    COMPRESS_BR_LEVEL = 1                   # brotli 使用最快压缩级别
+    COMPRESS_ALGORITHM = ['br', 'gzip']
+    COMPRESS_STREAMS = False                # 流式响应（SSE、文件下载）不压缩，避免缓冲推送内容
     
     # 日志配置
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
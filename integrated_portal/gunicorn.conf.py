@@ -0,0 +1,24 @@
+# gunicorn.conf.py
+# 统一门户生产环境部署配置
+# 启动命令：gunicorn -c gunicorn.conf.py wsgi:app
+#
+# 子系统的启动/停止状态保存在进程内（service_manager），多个worker之间不共享，
+# 因此默认单worker + 多线程（gthread）提供并发；各子系统的SSE长连接各占一个线程。
+# /health/stream 同样每个连接占一个线程：连接最长保持 HEALTH_STREAM_MAX_AGE 秒，
+# 同时在线数受 HEALTH_STREAM_MAX_SUBSCRIBERS 限制，应明显小于 threads，为其他路由留出线程。
+# Windows 不支持 gunicorn，请使用：waitress-serve --listen=0.0.0.0:9000 --threads=32 wsgi:app
+import os
+
+bind = os.environ.get('PORTAL_BIND', '0.0.0.0:' + os.environ.get('PORT', '9000'))
+workers = int(os.environ.get('PORTAL_WORKERS', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('PORTAL_THREADS', 32))
+
+# gthread worker 的心跳由主循环维护，长时间的流式请求不会触发该超时
+timeout = 120
+graceful_timeout = 30
+keepalive = 30
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('PORTAL_LOG_LEVEL', 'info')
@@ -4,19 +4,49 @@
 """
 import requests
 import logging
+import threading
+import time
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from config.settings import Config
 from services.service_manager import service_manager
+from utils.http_session import create_session
 
 logger = logging.getLogger(__name__)
 
+# 模块级默认线程池：未传入共享线程池时使用，每个子系统一个工作线程，整体耗时取决于最慢的一次探测
+_check_executor = ThreadPoolExecutor(
+    max_workers=max(len(Config.SUBSYSTEMS), 1),
+    thread_name_prefix='health-check'
+)
+
 class HealthCheckService:
     """健康检查服务类"""
     
-    def __init__(self):
+    def __init__(self, executor=None):
+        """
+        Args:
+            executor: 用于并发探测的线程池，通常为应用共享的 fan-out 线程池；
+                      为 None 时使用模块级默认线程池
+        """
         self.subsystems = Config.SUBSYSTEMS
+        self.executor = executor or _check_executor
         self.timeout = Config.HEALTH_CHECK_TIMEOUT
+        # (连接超时, 读取超时)：本机子系统连接应当很快建立，读取再给足时间
+        self.request_timeout = (Config.HEALTH_CHECK_CONNECT_TIMEOUT, self.timeout)
+        # 复用长连接，避免每次探测都重新建立TCP连接；健康检查不做重试，如实反映状态
+        self.session = create_session()
+        # 短时结果缓存：key -> (过期时间, 结果)，合并看板的高频轮询
+        self.cache_ttl = Config.HEALTH_CACHE_TTL
+        self._cache = {}
+        self._cache_locks = {}
+        self._cache_guard = threading.Lock()
+        # 后台轮询快照：后台线程定期探测并发布，接口直接返回最新快照
+        self._snapshot = None
+        self._snapshot_ts = None
+        self._snapshot_version = 0
+        self._snapshot_cond = threading.Condition()
+        self._background_thread = None
     
     def check_service(self, system_name, system_config):
         """
@@ -59,9 +89,9 @@ class HealthCheckService:
             elif system_name == 'meeting_minutes':
                 check_url = 'http://localhost:9000/meeting_minutes/'
 
-            response = requests.get(
+            response = self.session.get(
                 check_url,
-                timeout=self.timeout,
+                timeout=self.request_timeout,
                 allow_redirects=True
             )
             
@@ -129,16 +159,15 @@ class HealthCheckService:
             }
         }
         
-        # 使用线程池并发检查
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            # 提交所有检查任务
-            future_to_system = {
-                executor.submit(self.check_service, name, config): name
-                for name, config in self.subsystems.items()
-            }
-            
+        # 使用常驻线程池并发检查，单项探测已由 requests 超时兜底，这里再加整体上限
+        future_to_system = {
+            self.executor.submit(self.check_service, name, config): name
+            for name, config in self.subsystems.items()
+        }
+        
+        try:
             # 收集结果
-            for future in as_completed(future_to_system):
+            for future in as_completed(future_to_system, timeout=self.timeout + 1):
                 system_name = future_to_system[future]
                 try:
                     result = future.result()
@@ -158,6 +187,20 @@ class HealthCheckService:
                         'checked_at': datetime.now().isoformat()
                     }
                     results['summary']['error'] += 1
+        except FuturesTimeoutError:
+            # 超出整体时限仍未返回的子系统记为超时，不再等待
+            for future, system_name in future_to_system.items():
+                if system_name in results['services']:
+                    continue
+                future.cancel()
+                logger.warning(f"子系统 {system_name} 健康检查超时")
+                results['services'][system_name] = {
+                    'name': system_name,
+                    'status': 'timeout',
+                    'error': '请求超时',
+                    'checked_at': datetime.now().isoformat()
+                }
+                results['summary']['timeout'] += 1
         
         # 确定整体状态
         if results['summary']['down'] > 0 or results['summary']['error'] > 0:
@@ -188,6 +231,92 @@ class HealthCheckService:
         
         return self.check_service(system_name, self.subsystems[system_name])
     
+    def _get_cached(self, key, compute):
+        """
+        按 TTL 返回缓存结果，过期后重新计算
+
+        同一个 key 的并发请求共用一把锁，缓存失效时只有一个请求真正去探测，
+        其余请求等待后直接复用新结果
+        """
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        
+        with self._cache_guard:
+            lock = self._cache_locks.setdefault(key, threading.Lock())
+        with lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            result = compute()
+            self._cache[key] = (time.monotonic() + self.cache_ttl, result)
+            return result
+    
+    def get_cached_all_services(self):
+        """获取所有子系统的健康状态（带短时缓存）"""
+        return self._get_cached('__all__', self.check_all_services)
+    
+    def get_cached_service_status(self, system_name):
+        """获取指定子系统的健康状态（带短时缓存，未知子系统不入缓存）"""
+        if system_name not in self.subsystems:
+            return self.get_service_status(system_name)
+        return self._get_cached(system_name, lambda: self.get_service_status(system_name))
+    
+    def start_background(self, interval=None):
+        """
+        启动后台轮询线程，定期检查所有子系统并发布快照
+
+        客户端轮询频率与上游探测频率解耦：无论多少看板在轮询，
+        每个周期只探测一次
+
+        Args:
+            interval: 轮询间隔（秒），默认取 Config.HEALTH_POLL_INTERVAL
+        """
+        with self._snapshot_cond:
+            if self._background_thread is not None:
+                return
+            interval = interval or Config.HEALTH_POLL_INTERVAL
+            self._background_thread = threading.Thread(
+                target=self._background_loop,
+                args=(interval,),
+                name='health-poller',
+                daemon=True
+            )
+        self._background_thread.start()
+        logger.info(f"健康检查后台轮询已启动，间隔 {interval} 秒")
+    
+    def _background_loop(self, interval):
+        """后台轮询循环"""
+        while True:
+            try:
+                self._publish(self.check_all_services())
+            except Exception as e:
+                logger.error(f"后台健康检查失败: {str(e)}")
+            time.sleep(interval)
+    
+    def _publish(self, result):
+        """发布新的健康检查快照并唤醒等待者"""
+        with self._snapshot_cond:
+            self._snapshot = result
+            self._snapshot_ts = time.time()
+            self._snapshot_version += 1
+            self._snapshot_cond.notify_all()
+    
+    def get_snapshot(self):
+        """获取最新的后台快照，尚未完成首次检查时返回 None"""
+        return self._snapshot
+    
+    def wait_for_snapshot(self, last_version, timeout=None):
+        """
+        等待比 last_version 更新的快照
+
+        Returns:
+            (版本号, 快照)：超时未更新时返回原版本号和当前快照
+        """
+        with self._snapshot_cond:
+            self._snapshot_cond.wait_for(lambda: self._snapshot_version != last_version, timeout)
+            return self._snapshot_version, self._snapshot
+    
     def is_service_healthy(self, system_name):
         """
         检查指定子系统是否健康
@@ -7,9 +7,16 @@ from flask import Response, request, stream_with_context
 from urllib.parse import urljoin, urlparse
 import logging
 from config.settings import Config
+from utils.http_session import create_session
 
 logger = logging.getLogger(__name__)
 
+# 逐跳头部只对单条连接有效，不能转发给上游，否则会破坏连接池的长连接
+_HOP_BY_HOP_HEADERS = frozenset([
+    'host', 'content-length', 'connection', 'keep-alive', 'proxy-authenticate',
+    'proxy-authorization', 'te', 'trailers', 'transfer-encoding', 'upgrade'
+])
+
 class ProxyService:
     """反向代理服务类"""
     
@@ -17,6 +24,9 @@ class ProxyService:
         self.subsystems = Config.SUBSYSTEMS
         self.timeout = Config.PROXY_TIMEOUT
         self.retries = Config.PROXY_RETRIES
+        self.request_timeout = (Config.PROXY_CONNECT_TIMEOUT, self.timeout)
+        # 上游请求复用连接池；重试交给 urllib3 的 Retry（总尝试次数与原先保持一致）
+        self.session = create_session(retries=max(self.retries - 1, 0))
     
     def forward_request(self, system_name, path, flask_request):
         """
@@ -67,7 +77,7 @@ class ProxyService:
         # 复制请求头，排除一些不需要的头
         headers = {}
         for key, value in flask_request.headers:
-            if key.lower() not in ['host', 'content-length']:
+            if key.lower() not in _HOP_BY_HOP_HEADERS:
                 headers[key] = value
         
         # 构建请求参数
@@ -76,7 +86,7 @@ class ProxyService:
             'url': target_url,
             'headers': headers,
             'params': flask_request.args,
-            'timeout': self.timeout,
+            'timeout': self.request_timeout,
             'allow_redirects': False,
             'stream': True
         }
@@ -99,14 +109,7 @@ class ProxyService:
     
     def _send_request(self, **kwargs):
         """发送HTTP请求"""
-        for attempt in range(self.retries):
-            try:
-                response = requests.request(**kwargs)
-                return response
-            except requests.exceptions.RequestException as e:
-                if attempt == self.retries - 1:
-                    raise
-                logger.warning(f"请求失败，正在重试 ({attempt + 1}/{self.retries}): {str(e)}")
+        return self.session.request(**kwargs)
     
     def _build_flask_response(self, response):
         """构建Flask响应对象"""
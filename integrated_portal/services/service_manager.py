@@ -14,8 +14,13 @@ import json
 import sys
 from datetime import datetime, timedelta
 
+from utils.http_session import create_session
+
 logger = logging.getLogger(__name__)
 
+# 服务探测复用的连接池会话
+_probe_session = create_session(pool_connections=8, pool_maxsize=16)
+
 class ServiceManager:
     """服务管理器类"""
     
@@ -164,7 +169,7 @@ class ServiceManager:
         check_url = config['check_url']
         
         try:
-            response = requests.get(check_url, timeout=5)
+            response = _probe_session.get(check_url, timeout=5)
             return response.status_code == 200
         except requests.RequestException:
             return False
@@ -401,12 +406,41 @@ class ServiceManager:
             'name': self.services[service_name]['name']
         }
     
-    def get_all_services_status(self) -> Dict:
-        """获取所有服务的状态"""
-        status = {}
-        for service_name in self.services:
-            status[service_name] = self.get_service_status(service_name)
-        return status
+    def wait_for_running(self, service_name: str, timeout: float = 5.0,
+                         interval: float = 0.1) -> Tuple[bool, Dict]:
+        """
+        等待服务进入运行状态
+
+        每隔 interval 秒复查一次状态（端口与健康探测），进入 running 即返回，直到超时
+
+        Returns:
+            (是否运行中, 最后一次获取的服务状态)
+        """
+        status = self.get_service_status(service_name)
+        if service_name not in self.services:
+            return False, status
+        
+        deadline = time.monotonic() + timeout
+        while status.get('status') != 'running':
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False, status
+            time.sleep(min(interval, remaining))
+            status = self.get_service_status(service_name)
+        return True, status
+    
+    def get_all_services_status(self, executor=None) -> Dict:
+        """
+        获取所有服务的状态
+
+        Args:
+            executor: 可选的共享线程池，传入时并发查询各服务状态
+        """
+        if executor is None:
+            return {name: self.get_service_status(name) for name in self.services}
+        
+        futures = {name: executor.submit(self.get_service_status, name) for name in self.services}
+        return {name: future.result() for name, future in futures.items()}
     
     def start_monitoring(self):
         """启动服务监控"""
@@ -484,7 +518,7 @@ class ServiceManager:
             port = service_config['port']
             
             # 尝试连接服务端口
-            response = requests.get(f'http://localhost:{port}/', timeout=5)
+            response = _probe_session.get(f'http://localhost:{port}/', timeout=5)
             return response.status_code < 500
         except Exception as e:
             logger.debug(f"服务 {service_name} 健康检查失败: {e}")
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+数据处理系统表格数据查询测试：数据库端JSON组装与 query_table 路径的渲染保持一致
+"""
+import datetime
+import decimal
+
+import orjson
+from flask import Flask, jsonify
+
+from blueprints import case2pg
+from utils.response import OrjsonProvider
+
+COLUMNS = [
+    {'attname': '案号', 'type': 'text'},
+    {'attname': '立案日期', 'type': 'date'},
+    {'attname': '更新时间', 'type': 'timestamp with time zone'},
+    {'attname': '金额', 'type': 'numeric'},
+]
+
+
+def _stub_execute_query(monkeypatch, payload):
+    queries = []
+
+    def fake_execute_query(query, params=None, fetch_all=False):
+        queries.append((query, params))
+        if 'pg_attribute' in query:
+            return COLUMNS
+        return {'payload': payload}
+
+    monkeypatch.setattr(case2pg, 'execute_query', fake_execute_query)
+    return queries
+
+
+def test_query_table_as_json_renders_like_jsonify(monkeypatch):
+    queries = _stub_execute_query(monkeypatch, '[["(2024)行初1号", "Tue, 02 Jan 2024 00:00:00 GMT", null, "1.50"]]')
+
+    columns, rows = case2pg._query_table_as_json('case_summary', 1000)
+
+    assert columns == ['案号', '立案日期', '更新时间', '金额']
+    assert rows == [['(2024)行初1号', 'Tue, 02 Jan 2024 00:00:00 GMT', None, '1.50']]
+    assert queries[0][1] == ('case_summary',)
+    sql, params = queries[1]
+    assert params == (1000,)
+    assert 'to_char(r."立案日期"' in sql
+    assert 'to_char(r."更新时间" AT TIME ZONE \'UTC\'' in sql
+    assert 'r."金额"::text' in sql
+    assert 'ORDER BY r.__rn' in sql
+
+    # query_table 路径经 jsonify 输出的同一行数据，渲染结果与数据库端组装一致
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    with app.app_context():
+        fallback = orjson.loads(jsonify([
+            '(2024)行初1号', datetime.date(2024, 1, 2), None, decimal.Decimal('1.50')
+        ]).data)
+    assert fallback == rows[0]
+
+
+def test_query_table_as_json_empty_table(monkeypatch):
+    _stub_execute_query(monkeypatch, '[]')
+
+    assert case2pg._query_table_as_json('case_summary', 1000) == ([], [])
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+数据处理系统可用表格列表缓存测试
+"""
+
+import orjson
+import pytest
+
+from blueprints import case2pg
+
+
+class FakeRedis:
+    """只实现 get/setex 的内存Redis替身"""
+
+    def __init__(self, value=None):
+        self.store = {case2pg.TABLES_CACHE_REDIS_KEY: value} if value is not None else {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+
+@pytest.fixture(autouse=True)
+def _reset_cache(monkeypatch):
+    monkeypatch.setitem(case2pg._tables_cache, 'data', None)
+    monkeypatch.setitem(case2pg._tables_cache, 'expires_at', 0.0)
+
+
+def test_corrupt_shared_cache_falls_back_to_database(monkeypatch):
+    fake = FakeRedis(b'not json')
+    monkeypatch.setattr(case2pg, '_redis_client', fake)
+    monkeypatch.setattr(case2pg, '_get_table_stats', lambda tables: [{'table_name': 'case_summary'}])
+
+    assert case2pg._get_table_stats_cached(case2pg.AVAILABLE_TABLES) == [{'table_name': 'case_summary'}]
+    # 数据库结果重新写回共享缓存
+    assert orjson.loads(fake.store[case2pg.TABLES_CACHE_REDIS_KEY]) == [{'table_name': 'case_summary'}]
+
+
+def test_shared_cache_hit_skips_database(monkeypatch):
+    monkeypatch.setattr(case2pg, '_redis_client', FakeRedis(orjson.dumps([{'table_name': 'x'}])))
+
+    def fail(tables):
+        raise AssertionError('不应查询数据库')
+
+    monkeypatch.setattr(case2pg, '_get_table_stats', fail)
+
+    assert case2pg._get_table_stats_cached(case2pg.AVAILABLE_TABLES) == [{'table_name': 'x'}]
+
+
+def test_lock_not_held_while_fetching(monkeypatch):
+    def check_unlocked(tables):
+        assert not case2pg._tables_cache_lock.locked()
+        return []
+
+    monkeypatch.setattr(case2pg, '_redis_client', None)
+    monkeypatch.setattr(case2pg, '_get_table_stats', check_unlocked)
+
+    assert case2pg._get_table_stats_cached(case2pg.AVAILABLE_TABLES) == []
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+数据处理系统工作流事件测试：字节级预过滤只解析"问题分类器"节点完成事件
+"""
+import json
+import re
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+from blueprints import case2pg
+
+USER_ID = 'test-user'
+
+
+def _event(event, title, ensure_ascii=False, **data):
+    payload = {'event': event, 'data': dict(data, title=title)}
+    return json.dumps(payload, ensure_ascii=ensure_ascii).encode('utf-8')
+
+
+@pytest.fixture(autouse=True)
+def _reset_state():
+    case2pg._reset_workflow_state(USER_ID)
+    yield
+    case2pg._reset_workflow_state(USER_ID)
+
+
+@pytest.fixture
+def loads_calls(monkeypatch):
+    calls = []
+
+    def spy(payload):
+        calls.append(payload)
+        return orjson.loads(payload)
+
+    monkeypatch.setattr(case2pg, 'orjson', SimpleNamespace(loads=spy, JSONDecodeError=orjson.JSONDecodeError))
+    return calls
+
+
+@pytest.mark.parametrize('payload', [
+    _event('node_finished', '问题分类器', outputs={'class_name': '合同'}),
+    _event('node_finished', '问题分类器', ensure_ascii=True, outputs={'class_name': '合同'}),
+    # 部分编码器输出大写十六进制的 \u 转义
+    re.sub(rb'\\u([0-9a-f]{4})', lambda m: b'\\u' + m.group(1).upper(),
+           _event('node_finished', '问题分类器', ensure_ascii=True, outputs={'class_name': '合同'})),
+])
+def test_classifier_event_is_extracted(payload):
+    case2pg._record_workflow_event(USER_ID, payload)
+
+    has_output, node = case2pg._get_workflow_classifier(USER_ID)
+    assert has_output
+    assert node['outputs'] == {'class_name': '合同'}
+
+
+@pytest.mark.parametrize('payload', [
+    _event('node_started', '问题分类器'),
+    _event('node_finished', '开始'),
+    _event('text_chunk', '问题分类器'),
+])
+def test_other_events_are_not_parsed(payload, loads_calls):
+    case2pg._record_workflow_event(USER_ID, payload)
+
+    assert loads_calls == []
+    assert case2pg._get_workflow_classifier(USER_ID) == (True, None)
+
+
+def test_latest_classifier_wins():
+    case2pg._record_workflow_event(USER_ID, _event('node_finished', '问题分类器', outputs={'class_name': '合同'}))
+    case2pg._record_workflow_event(USER_ID, _event('node_finished', '问题分类器', outputs={'class_name': '复议'}))
+
+    assert case2pg._get_workflow_classifier(USER_ID)[1]['outputs'] == {'class_name': '复议'}
+
+
+def test_forward_and_extract_passes_bytes_through():
+    first = _event('node_started', '问题分类器')
+    second = _event('node_finished', '问题分类器', outputs={'class_name': '诉讼'})
+    body = b'data: ' + first + b'\n\ndata: ' + second + b'\n\n'
+    # 事件被拆分在多个网络分块中
+    chunks = [body[:10], body[10:len(first) + 3], body[len(first) + 3:]]
+    resp = SimpleNamespace(iter_content=lambda chunk_size=None: iter(chunks))
+    received = []
+
+    forwarded = b''.join(case2pg.forward_and_extract(resp, received.append))
+
+    assert forwarded == body
+    assert received == [first, second]
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+服务管理器等待就绪逻辑测试
+"""
+import time
+
+from services.service_manager import ServiceManager
+
+
+def _make_manager(statuses):
+    """构造不启动监控线程的服务管理器，get_service_status 依次返回给定状态"""
+    manager = ServiceManager.__new__(ServiceManager)
+    manager.services = {'case2pg': {'name': '数据处理系统', 'port': 5001}}
+    calls = []
+
+    def fake_status(service_name):
+        calls.append(service_name)
+        return {'status': statuses[min(len(calls), len(statuses)) - 1]}
+
+    manager.get_service_status = fake_status
+    return manager, calls
+
+
+def test_wait_for_running_polls_at_interval_until_timeout():
+    manager, calls = _make_manager(['stopped'])
+
+    started = time.monotonic()
+    running, status = manager.wait_for_running('case2pg', timeout=0.5, interval=0.1)
+    elapsed = time.monotonic() - started
+
+    assert running is False
+    assert status['status'] == 'stopped'
+    assert 0.45 <= elapsed < 1.0
+    # 首次检查 + 每个间隔一次，不会忙等
+    assert len(calls) <= 7
+
+
+def test_wait_for_running_returns_once_running():
+    manager, calls = _make_manager(['stopped', 'unhealthy', 'running'])
+
+    running, status = manager.wait_for_running('case2pg', timeout=5, interval=0.01)
+
+    assert running is True
+    assert status['status'] == 'running'
+    assert len(calls) == 3
+
+
+def test_wait_for_running_unknown_service():
+    manager, calls = _make_manager(['stopped'])
+
+    running, _ = manager.wait_for_running('unknown', timeout=5)
+
+    assert running is False
+    assert len(calls) == 1
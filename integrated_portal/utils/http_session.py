@@ -0,0 +1,35 @@
+"""
+HTTP会话工具模块
+为健康检查、反向代理等出站请求提供复用连接的 requests 会话
+"""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+def create_session(pool_connections=32, pool_maxsize=64, retries=0, backoff_factor=0.2):
+    """
+    创建挂载连接池的 requests 会话
+
+    Args:
+        pool_connections: 缓存的主机连接池数量
+        pool_maxsize: 每个主机连接池保留的最大连接数
+        retries: 失败重试次数，0 表示不重试
+        backoff_factor: 重试退避系数
+
+    Returns:
+        requests.Session: 配置好的会话，默认即为 keep-alive 长连接
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False
+        )
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
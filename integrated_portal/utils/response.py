@@ -0,0 +1,52 @@
+"""
+响应工具模块
+提供基于orjson的JSON响应构造函数和Flask JSON提供器
+"""
+import orjson
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+_JSON_MIMETYPE = 'application/json'
+
+def ojson(payload, status=200):
+    """
+    构造JSON响应
+    
+    使用orjson序列化，中文直接以UTF-8输出，不做逐字符转义
+    
+    Args:
+        payload: 要序列化的数据
+        status: HTTP状态码
+        
+    Returns:
+        Response: JSON响应对象
+    """
+    return Response(
+        orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS),
+        status=status,
+        mimetype=_JSON_MIMETYPE
+    )
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    基于orjson的Flask JSON提供器
+    
+    替换 app.json 后，jsonify 及依赖它的响应函数都改用orjson序列化；
+    日期、Decimal、UUID等orjson不直接处理的类型仍交给Flask默认规则，输出格式保持不变
+    """
+    
+    def _option(self):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._option()).decode('utf-8')
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self._option()),
+            mimetype=self.mimetype
+        )
@@ -0,0 +1,12 @@
+"""
+统一门户WSGI入口
+生产环境通过 gunicorn / waitress 加载：
+    gunicorn -c gunicorn.conf.py wsgi:app
+    waitress-serve --listen=0.0.0.0:9000 --threads=32 wsgi:app
+"""
+from app import create_app
+from config.settings import Config
+
+app = create_app()
+# 健康检查后台轮询只在服务入口启动，测试或脚本中 create_app() 不会产生常驻线程
+app.extensions['health_service'].start_background(Config.HEALTH_POLL_INTERVAL)